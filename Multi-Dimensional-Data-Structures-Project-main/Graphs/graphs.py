@@ -1,8 +1,11 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from typing import TYPE_CHECKING
 
-def read_csv_file(file_path: str) -> pd.DataFrame:
+# pandas, matplotlib and seaborn are only imported when the data is read or plotted,
+# so importing this module stays cheap
+if TYPE_CHECKING:
+    import pandas as pd
+
+def read_csv_file(file_path: str) -> "pd.DataFrame":
     """Reads a CSV file and returns a pandas DataFrame.
 
     Args:
@@ -12,9 +15,11 @@ def read_csv_file(file_path: str) -> pd.DataFrame:
         pd.DataFrame: The data from the CSV file as a pandas DataFrame.
 
     """
+    import pandas as pd
+
     return pd.read_csv(file_path)
 
-def plot_data(df: pd.DataFrame):
+def plot_data(df: "pd.DataFrame"):
     """Plots the data from the DataFrame.
 
     Args:
@@ -22,6 +27,9 @@ def plot_data(df: pd.DataFrame):
         df (pd.DataFrame): The DataFrame containing the data.
 
     """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     trees = df['Tree'].unique()
     input_sizes = df['Input Size'].unique()
 
@@ -80,6 +88,10 @@ def plot_data(df: pd.DataFrame):
     plt.grid(True)
     plt.show()
 
-# Use the functions
-df = read_csv_file(r'Graphs\times.csv')
-plot_data(df)
\ No newline at end of file
+def main():
+    """Reads the measured times and plots them."""
+    df = read_csv_file(r'Graphs\times.csv')
+    plot_data(df)
+
+if __name__ == "__main__":
+    main()
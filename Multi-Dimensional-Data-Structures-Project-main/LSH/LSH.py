@@ -1,12 +1,50 @@
 from random import shuffle
 import csv
-from itertools import combinations
+import heapq
+import multiprocessing
+import os
+import time
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Prime modulus of the universal hash functions, larger than any shingle fingerprint
+MERSENNE_PRIME = (1 << 31) - 1
+# Number of (hash function, shingle) values hashed at once by UniversalMinHash
+HASH_BLOCK_SIZE = 1 << 22
+# Start value and odd multiplier of the polynomial band hash
+BAND_HASH_SEED = np.uint64(0x9E3779B97F4A7C15)
+BAND_HASH_MULTIPLIER = np.uint64(0x100000001B3)
+# Buckets larger than this are only paired with a representative instead of all-pairs
+MAX_BUCKET_SIZE = 1000
+# Odd base of the rolling shingle hash, and its inverse modulo 2**64
+ROLLING_HASH_BASE = np.uint64(0x100000001B3)
+ROLLING_HASH_INVERSE = np.uint64(pow(0x100000001B3, -1, 1 << 64))
+# Odd multiplier mixing 64-bit shingle hashes before they are folded to fingerprints
+FINGERPRINT_MULTIPLIER = np.uint64(0xD6E8FEB86659FD93)
+# Code points separating words in word-level shingling
+WHITESPACE_CODE_POINTS = np.array([ord(c) for c in " \t\n\r\f\v"], dtype=np.uint64)
+# Number of signature positions or shingle ids compared at once when verifying pairs
+VERIFY_BLOCK_SIZE = 1 << 22
+# Candidate pairs with their estimated and exact Jaccard similarity
+SCORED_PAIR_DTYPE = np.dtype(
+    [("a", np.int64), ("b", np.int64), ("estimated", np.float64), ("exact", np.float64)]
+)
+# Number of bits that b-bit MinHash can keep of every value
+B_BIT_WIDTHS = (1, 2, 4, 8)
+# Number of points of the trapezoidal rule when integrating the S-curve
+INTEGRATION_POINTS = 200
+# LSHForest trees insert up to this many pending keys one by one instead of merging
+FOREST_INSERT_SIZE = 32
 
 
 class Shingling:
     """
     This class provides methods for generating shingles from text, creating a vocabulary from multiple sets of shingles,
-    performing one-hot encoding, and creating zero vectors.
+    performing one-hot encoding, and creating zero vectors, as well as encoding many texts as sorted rolling-hash
+    shingle fingerprints.
     """
 
     @staticmethod
@@ -37,10 +75,96 @@ class Shingling:
         Returns:
         - set: The combined vocabulary.
         """
-        vocabulary = set()
-        for shingle_set in shingle_sets:
-            vocabulary = vocabulary.union(shingle_set)
-        return vocabulary
+        return set().union(*shingle_sets)
+
+    @staticmethod
+    def span_hashes(values, starts, ends):
+        """
+        Compute the Rabin-Karp polynomial hash of many spans of a sequence at once.
+
+        With prefix sums S[i] = sum(values[j] * B^-j for j <= i), the hash
+        sum(values[j] * B^(end - 1 - j) for start <= j < end) of any span is
+        B^(end - 1) * (S[end - 1] - S[start - 1]). All arithmetic wraps modulo 2**64,
+        where the odd base B is invertible.
+
+        Args:
+        - values (np.ndarray): The uint64 sequence.
+        - starts (np.ndarray): The first position of every span.
+        - ends (np.ndarray): The position after the last of every span.
+
+        Returns:
+        - np.ndarray: The uint64 hash of every span.
+        """
+        powers = np.full(len(values), ROLLING_HASH_BASE, dtype=np.uint64)
+        inverse_powers = np.full(len(values), ROLLING_HASH_INVERSE, dtype=np.uint64)
+        if len(values):
+            powers[0] = inverse_powers[0] = 1
+        powers = np.cumprod(powers, dtype=np.uint64)
+        prefix = np.zeros(len(values) + 1, dtype=np.uint64)
+        prefix[1:] = np.cumsum(values * np.cumprod(inverse_powers, dtype=np.uint64), dtype=np.uint64)
+
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        return powers[ends - 1] * (prefix[ends] - prefix[starts])
+
+    @staticmethod
+    def fingerprint_sets(texts: list, k: int, words: bool = False):
+        """
+        Shingle many texts into sorted 31-bit shingle fingerprints, stored CSR-style.
+
+        The texts are concatenated as code points and every k-character shingle (or
+        k-word shingle if words is set) is hashed with a rolling hash in one pass;
+        shingles crossing the end of a text are dropped. No shingle strings and no
+        vocabulary are created, so ids of different datasets are comparable. The
+        fingerprints are folded below MERSENNE_PRIME, the modulus of UniversalMinHash,
+        since ids p apart would get the same value from every hash function.
+
+        Args:
+        - texts (list): The input texts.
+        - k (int): The length of each shingle, in characters or words.
+        - words (bool): Shingle words instead of characters.
+
+        Returns:
+        - tuple: (indices, offsets), where indices[offsets[i]:offsets[i + 1]] are the
+          sorted distinct uint32 shingle fingerprints of texts[i], all below MERSENNE_PRIME.
+        """
+        encoded = "".join(texts).encode("utf-32-le")
+        values = np.frombuffer(encoded, dtype=np.uint32).astype(np.uint64)
+        ends = np.cumsum([len(text) for text in texts], dtype=np.int64)
+        documents = np.searchsorted(ends, np.arange(len(values)), side="right")
+
+        if words:
+            # Hash every maximal run of non-space characters, and shingle the words
+            space = np.isin(values, WHITESPACE_CODE_POINTS)
+            boundary = np.ones(len(values), dtype=bool)
+            boundary[1:] = space[:-1] | (documents[1:] != documents[:-1])
+            word_starts = np.flatnonzero(boundary & ~space)
+            # A word ends at the first space or the end of its text after its start
+            next_space = np.append(np.flatnonzero(space), len(values))
+            word_ends = np.minimum(
+                next_space[np.searchsorted(next_space, word_starts)],
+                ends[documents[word_starts]],
+            )
+            values = Shingling.span_hashes(values, word_starts, word_ends)
+            documents = documents[word_starts]
+            ends = np.searchsorted(documents, np.arange(len(texts)), side="right")
+
+        # Keep the windows that end inside their own text
+        starts = np.arange(max(len(values) - k + 1, 0), dtype=np.int64)
+        starts = starts[starts + k <= ends[documents[starts]]] if len(starts) else starts
+        hashes = Shingling.span_hashes(values, starts, starts + k)
+        # Mix the high bits down, since the low bits of a polynomial hash are weak
+        hashes ^= hashes >> np.uint64(29)
+        # Scale the top 32 bits of the mixed hash into [0, MERSENNE_PRIME)
+        fingerprints = (hashes * FINGERPRINT_MULTIPLIER) >> np.uint64(32)
+        fingerprints = (fingerprints * np.uint64(MERSENNE_PRIME)) >> np.uint64(32)
+
+        # One sort groups the fingerprints by text and drops the repeated ones
+        keys = np.sort((documents[starts].astype(np.uint64) << np.uint64(32)) | fingerprints)
+        keys = keys[np.append(True, keys[1:] != keys[:-1])] if len(keys) else keys
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        offsets[1:] = np.searchsorted(keys >> np.uint64(32), np.arange(len(texts)), side="right")
+        return keys.astype(np.uint32), offsets
 
     @staticmethod
 
@@ -142,42 +266,418 @@ class MinHash:
         return signature
 
 
+class UniversalMinHash:
+    """
+    This class implements the MinHash algorithm with universal hash functions
+    h(x) = (a * x + b) mod p over integer shingle ids, instead of explicit permutations
+    of the vocabulary. All signatures are computed with NumPy min-reductions.
+    """
+
+    def __init__(self, hash_functions_count: int, seed=None):
+        """
+        Initialize the UniversalMinHash object by drawing the coefficients
+        of the hash functions.
+
+        Args:
+        - hash_functions_count (int): The number of hash functions to use.
+        - seed (int): Optional seed, so that signatures are reproducible.
+        """
+        self.hash_functions_count = hash_functions_count
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, size=hash_functions_count, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, size=hash_functions_count, dtype=np.uint64)
+
+    def hash_values(self, shingle_ids):
+        """
+        Apply every hash function to the given shingle ids.
+
+        Args:
+        - shingle_ids (np.ndarray): Integer shingle ids, below MERSENNE_PRIME.
+
+        Returns:
+        - np.ndarray: A (hash_functions_count, len(shingle_ids)) array of hash values.
+        """
+        shingle_ids = np.asarray(shingle_ids, dtype=np.uint64)
+        # a < 2**31 and x < 2**31, so a * x + b cannot overflow 64 bits
+        return (self.a[:, None] * shingle_ids[None, :] + self.b[:, None]) % np.uint64(MERSENNE_PRIME)
+
+    def minhash(self, shingle_ids):
+        """
+        Generate the minhash signature for the shingle ids of one document.
+
+        Args:
+        - shingle_ids (np.ndarray): The integer ids of the document's shingles.
+
+        Returns:
+        - np.ndarray: The minhash signature. A document without shingles gets
+          MERSENNE_PRIME, a value no hash function produces, in every position.
+        """
+        if len(shingle_ids) == 0:
+            return np.full(self.hash_functions_count, MERSENNE_PRIME, dtype=np.uint32)
+        return self.hash_values(shingle_ids).min(axis=1).astype(np.uint32)
+
+    def signatures(self, indices, offsets):
+        """
+        Generate the minhash signatures of many documents at once.
+
+        The shingle ids of document i are indices[offsets[i]:offsets[i + 1]].
+        Documents are processed in blocks, and the signatures of a block are
+        one min-reduction over the hashed ids of all its documents.
+
+        Args:
+        - indices (np.ndarray): The concatenated shingle ids of all documents.
+        - offsets (np.ndarray): The start of each document in indices, plus the total length.
+
+        Returns:
+        - np.ndarray: A (documents, hash_functions_count) uint32 signature matrix.
+        """
+        indices = np.asarray(indices)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        documents = len(offsets) - 1
+        signatures = np.full((documents, self.hash_functions_count), MERSENNE_PRIME, dtype=np.uint32)
+        block_shingles = max(1, HASH_BLOCK_SIZE // max(1, self.hash_functions_count))
+
+        start = 0
+        while start < documents:
+            # Take as many documents as fit in the block, at least one
+            stop = np.searchsorted(offsets, offsets[start] + block_shingles, side="right") - 1
+            stop = min(max(stop, start + 1), documents)
+
+            lengths = np.diff(offsets[start : stop + 1])
+            non_empty = np.flatnonzero(lengths)
+            if len(non_empty):
+                hashed = self.hash_values(indices[offsets[start] : offsets[stop]])
+                starts = offsets[start + non_empty] - offsets[start]
+                signatures[start + non_empty] = np.minimum.reduceat(hashed, starts, axis=1).T
+            start = stop
+
+        return signatures
+
+    @classmethod
+    def from_coefficients(cls, a, b):
+        """
+        Rebuild a UniversalMinHash object from the coefficients of its hash functions.
+
+        Args:
+        - a (np.ndarray): The multipliers of the hash functions.
+        - b (np.ndarray): The increments of the hash functions.
+
+        Returns:
+        - UniversalMinHash: An object computing the same signatures.
+        """
+        minhash_instance = cls.__new__(cls)
+        minhash_instance.hash_functions_count = len(a)
+        minhash_instance.a = np.asarray(a, dtype=np.uint64)
+        minhash_instance.b = np.asarray(b, dtype=np.uint64)
+        return minhash_instance
+
+    def parallel_signatures(self, indices, offsets, processes=None, chunk_documents=None):
+        """
+        Generate the minhash signatures of many documents with a pool of processes.
+
+        The shingle ids, offsets and signature matrix are placed in shared memory.
+        Every process signs chunks of documents in place, so only the chunk bounds
+        are pickled. The signatures are the same as those of signatures().
+
+        Args:
+        - indices (np.ndarray): The concatenated shingle ids of all documents.
+        - offsets (np.ndarray): The start of each document in indices, plus the total length.
+        - processes (int): The number of processes, by default the number of CPUs.
+        - chunk_documents (int): The number of documents of a chunk, by default
+          enough for about four chunks per process.
+
+        Returns:
+        - np.ndarray: A (documents, hash_functions_count) uint32 signature matrix.
+        """
+        processes = processes or os.cpu_count() or 1
+        documents = len(offsets) - 1
+        if processes == 1 or documents < 2:
+            return self.signatures(indices, offsets)
+        if chunk_documents is None:
+            chunk_documents = -(-documents // (processes * 4))
+
+        arrays = {
+            "indices": np.asarray(indices),
+            "offsets": np.asarray(offsets, dtype=np.int64),
+            "signatures": np.empty((documents, self.hash_functions_count), dtype=np.uint32),
+        }
+        blocks, shared = [], {}
+        try:
+            for key, array in arrays.items():
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                blocks.append(block)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+                shared[key] = (block.name, array.shape, array.dtype)
+
+            chunks = [
+                (start, min(start + chunk_documents, documents))
+                for start in range(0, documents, chunk_documents)
+            ]
+            with multiprocessing.Pool(
+                processes, initializer=init_signing_worker, initargs=(shared, self.a, self.b)
+            ) as pool:
+                pool.map(sign_chunk, chunks)
+
+            signatures = arrays["signatures"]
+            signatures[...] = np.ndarray(signatures.shape, dtype=signatures.dtype, buffer=blocks[-1].buf)
+            return signatures
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+
+# State of a signing process of UniversalMinHash.parallel_signatures
+signing_worker = {}
+
+
+def attach_shared_array(name: str, shape, dtype):
+    """
+    Attach to a shared memory block and view it as an array.
+
+    Args:
+    - name (str): The name of the shared memory block.
+    - shape (tuple): The shape of the array.
+    - dtype (np.dtype): The dtype of the array.
+
+    Returns:
+    - tuple: The SharedMemory object, which must be kept alive, and the array.
+    """
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def init_signing_worker(arrays, a, b):
+    """
+    Initialize a signing process: attach the shared inputs and output and rebuild
+    the hash functions from their coefficients.
+
+    Args:
+    - arrays (dict): (name, shape, dtype) of the shared indices, offsets and signatures.
+    - a (np.ndarray): The multipliers of the hash functions.
+    - b (np.ndarray): The increments of the hash functions.
+    """
+    global signing_worker
+    blocks, views = [], {}
+    for key, (name, shape, dtype) in arrays.items():
+        block, views[key] = attach_shared_array(name, shape, dtype)
+        blocks.append(block)
+    signing_worker = {
+        "blocks": blocks,
+        "minhash": UniversalMinHash.from_coefficients(a, b),
+        **views,
+    }
+
+
+def sign_chunk(chunk):
+    """
+    Sign a chunk of documents in a signing process, writing the signatures
+    straight into the shared signature matrix.
+
+    Args:
+    - chunk (tuple): The first and one past the last document of the chunk.
+    """
+    start, stop = chunk
+    offsets = signing_worker["offsets"]
+    indices = signing_worker["indices"][offsets[start] : offsets[stop]]
+    signing_worker["signatures"][start:stop] = signing_worker["minhash"].signatures(
+        indices, offsets[start : stop + 1] - offsets[start]
+    )
+
+
+class BBitMinHash:
+    """
+    This class implements b-bit MinHash: only the lowest b bits of every MinHash value
+    are kept, packed 64 / b to a uint64 word. Agreement is counted with XOR and
+    popcount, and the Jaccard similarity is recovered with the bias correction
+    J = (E - 2^-b) / (1 - 2^-b), since two b-bit values also agree by chance.
+    """
+
+    def __init__(self, bits: int, hash_functions_count: int):
+        """
+        Initialize the BBitMinHash object.
+
+        Args:
+        - bits (int): The number of bits kept of each value: 1, 2, 4 or 8.
+        - hash_functions_count (int): The number of values of a full signature.
+        """
+        assert bits in B_BIT_WIDTHS
+        self.bits = bits
+        self.hash_functions_count = hash_functions_count
+        self.values_per_word = 64 // bits
+        self.words = -(-hash_functions_count // self.values_per_word)
+        # The lowest bit of every b-bit field of a word
+        self.low_bits = np.uint64(sum(1 << (i * bits) for i in range(self.values_per_word)))
+
+    @staticmethod
+    def popcount(words):
+        """
+        Count the set bits of every uint64 word.
+
+        Args:
+        - words (np.ndarray): The uint64 words.
+
+        Returns:
+        - np.ndarray: The number of set bits of every word.
+        """
+        words = np.asarray(words, dtype=np.uint64)
+        if hasattr(np, "bitwise_count"):
+            return np.bitwise_count(words)
+
+        # SWAR popcount for NumPy versions without bitwise_count
+        words = words - ((words >> np.uint64(1)) & np.uint64(0x5555555555555555))
+        words = (words & np.uint64(0x3333333333333333)) + ((words >> np.uint64(2)) & np.uint64(0x3333333333333333))
+        words = (words + (words >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+        return (words * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+    def pack(self, signatures):
+        """
+        Keep the lowest bits of every signature value and pack them into words.
+
+        Args:
+        - signatures (np.ndarray): A (n, hash_functions_count) signature matrix.
+
+        Returns:
+        - np.ndarray: A (n, words) uint64 matrix of packed signatures.
+        """
+        signatures = np.atleast_2d(np.asarray(signatures))
+        values = np.zeros((len(signatures), self.words * self.values_per_word), dtype=np.uint64)
+        values[:, : self.hash_functions_count] = signatures & ((1 << self.bits) - 1)
+        values = values.reshape(len(signatures), self.words, self.values_per_word)
+
+        shifts = np.arange(self.values_per_word, dtype=np.uint64) * np.uint64(self.bits)
+        return np.bitwise_or.reduce(values << shifts, axis=2)
+
+    def unpack(self, packed):
+        """
+        Unpack packed signatures into their b-bit values.
+
+        Args:
+        - packed (np.ndarray): A (n, words) matrix of packed signatures.
+
+        Returns:
+        - np.ndarray: A (n, hash_functions_count) uint8 matrix of b-bit values.
+        """
+        packed = np.atleast_2d(np.asarray(packed, dtype=np.uint64))
+        shifts = np.arange(self.values_per_word, dtype=np.uint64) * np.uint64(self.bits)
+        values = (packed[:, :, None] >> shifts) & np.uint64((1 << self.bits) - 1)
+        return values.reshape(len(packed), -1)[:, : self.hash_functions_count].astype(np.uint8)
+
+    def agreements(self, packed_a, packed_b):
+        """
+        Count the positions on which packed signatures agree, row by row.
+
+        Args:
+        - packed_a (np.ndarray): A (n, words) matrix of packed signatures.
+        - packed_b (np.ndarray): A (n, words) matrix of packed signatures.
+
+        Returns:
+        - np.ndarray: The number of agreeing b-bit values of every row.
+        """
+        differences = np.asarray(packed_a, dtype=np.uint64) ^ np.asarray(packed_b, dtype=np.uint64)
+        # Fold every b-bit field onto its lowest bit, which is then set iff the values differ
+        shift = 1
+        while shift < self.bits:
+            differences |= differences >> np.uint64(shift)
+            shift *= 2
+        differing = self.popcount(differences & self.low_bits).sum(axis=1, dtype=np.int64)
+        # Padding fields are zero in both signatures, so they never differ
+        return self.hash_functions_count - differing
+
+    def similarities(self, pairs, packed):
+        """
+        Estimate the Jaccard similarity of many pairs from their packed signatures.
+
+        Args:
+        - pairs (np.ndarray): A (m, 2) array of document indexes.
+        - packed (np.ndarray): The (documents, words) matrix of packed signatures.
+
+        Returns:
+        - np.ndarray: The m bias-corrected similarity estimates, clipped at 0.
+        """
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        packed = np.asarray(packed)
+        agree = np.empty(len(pairs))
+        block_pairs = max(1, VERIFY_BLOCK_SIZE // max(1, self.words))
+
+        for start in range(0, len(pairs), block_pairs):
+            block = pairs[start : start + block_pairs]
+            agree[start : start + len(block)] = self.agreements(packed[block[:, 0]], packed[block[:, 1]])
+
+        return np.maximum(self.correct(agree / self.hash_functions_count), 0.0)
+
+    def correct(self, agreement):
+        """
+        Remove the chance agreement of b-bit values from an agreement fraction.
+
+        Args:
+        - agreement (float or np.ndarray): The fraction of agreeing positions.
+
+        Returns:
+        - float or np.ndarray: The estimated Jaccard similarity.
+        """
+        chance = 2.0 ** -self.bits
+        return (agreement - chance) / (1 - chance)
+
+    def agreement(self, similarity):
+        """
+        The expected fraction of agreeing positions at a Jaccard similarity, the
+        inverse of correct().
+
+        Args:
+        - similarity (float or np.ndarray): The Jaccard similarity.
+
+        Returns:
+        - float or np.ndarray: The expected fraction of agreeing positions.
+        """
+        chance = 2.0 ** -self.bits
+        return chance + (1 - chance) * similarity
+
+
 class LSH:
     """
     This class implements the Locality Sensitive Hashing (LSH) algorithm for finding candidate pairs.
     """
 
-    buckets = []
-    index_counter = 0
-
-    def __init__(self, b):
+    def __init__(self, b, max_bucket_size=MAX_BUCKET_SIZE):
         """
         Initialize the LSH object with the number of bands.
 
         Args:
         - b (int): The number of bands.
+        - max_bucket_size (int): Buckets with more indexes than this only produce pairs
+          between their first index, as a representative, and every other index.
         """
         self.b = b
-        for i in range(b):
-            self.buckets.append({})
+        self.max_bucket_size = max_bucket_size
+        # Band hashes belong to the instance, so separate runs never share buckets
+        self.band_hash_blocks = []
+        self.index_counter = 0
 
-    def split_signature_vector(self, signature):
+    @staticmethod
+    def hash_bands(signatures, b):
         """
-        Split the signature vector into b bands.
+        Hash every band of every signature to a 64-bit integer.
+
+        Each band is reduced with a polynomial hash over its rows, computed for all
+        signatures and bands at once with wrapping uint64 arithmetic.
 
         Args:
-        - signature (list): The signature vector.
+        - signatures (np.ndarray): A (n, H) signature matrix, or a single signature.
+        - b (int): The number of bands, which must divide H.
 
         Returns:
-        - list: The list of bands.
+        - np.ndarray: A (n, b) uint64 matrix of band hashes.
         """
-        assert len(signature) % self.b == 0
-        rows = int(len(signature) / self.b)
-        subvecs = []
-        for i in range(0, len(signature), rows):
-            subvecs.append(signature[i : i + rows])
+        signatures = np.atleast_2d(np.asarray(signatures)).astype(np.uint64)
+        documents, length = signatures.shape
+        assert length % b == 0
+        bands = signatures.reshape(documents, b, length // b)
 
-        return subvecs
+        hashes = np.full((documents, b), BAND_HASH_SEED, dtype=np.uint64)
+        for row in range(bands.shape[2]):
+            hashes = hashes * BAND_HASH_MULTIPLIER + bands[:, :, row]
+        return hashes
 
     def add_signature_hash(self, signature):
         """Adds a signature hash to the appropriate buckets for efficient retrieval.
@@ -188,27 +688,85 @@ class LSH:
         Returns:
             None
         """
-        subvectors = self.split_signature_vector(signature)
+        self.add_signatures([signature])
+
+    def add_signatures(self, signatures):
+        """
+        Add many signatures at once, hashing all their bands in bulk.
+
+        Args:
+        - signatures (np.ndarray): A (n, H) signature matrix.
+        """
+        hashes = LSH.hash_bands(signatures, self.b)
+        self.band_hash_blocks.append(hashes)
+        self.index_counter += len(hashes)
+
+    def bucket_groups(self):
+        """
+        Group the signatures into buckets, band by band, by sorting their band hashes.
+
+        Returns:
+        - list: One (order, starts, sizes) tuple per band, where the indexes in bucket j
+          of the band are order[starts[j]:starts[j] + sizes[j]], in insertion order.
+        """
+        if not self.band_hash_blocks:
+            return []
+        hashes = np.concatenate(self.band_hash_blocks)
+        self.band_hash_blocks = [hashes]
+
+        groups = []
+        for band in range(self.b):
+            order = np.argsort(hashes[:, band], kind="stable")
+            sorted_hashes = hashes[order, band]
+            starts = np.flatnonzero(np.r_[True, sorted_hashes[1:] != sorted_hashes[:-1]])
+            sizes = np.diff(np.r_[starts, len(order)])
+            groups.append((order, starts, sizes))
+        return groups
+
+    def iter_candidate_pairs(self):
+        """
+        Generate the candidate pairs of the buckets, one band at a time.
+
+        Buckets of up to max_bucket_size indexes produce all their pairs, generated
+        together for all buckets of the same size. A larger bucket, typically texts
+        sharing boilerplate, only pairs its representative with each other index,
+        so it costs linear instead of quadratic memory.
+
+        Yields:
+        - np.ndarray: A (m, 2) int64 array of (i, j) pairs with i < j for one band.
+          Pairs found in several bands are yielded once per band.
+        """
+        for order, starts, sizes in self.bucket_groups():
+            pairs = []
 
-        # Convert subvectors to strings for efficient handling within buckets
-        subvector_strings = [[str(num) for num in subvec] for subvec in subvectors]
+            shared = (sizes > 1) & (sizes <= self.max_bucket_size)
+            for size in np.unique(sizes[shared]):
+                members = order[starts[sizes == size][:, None] + np.arange(size)]
+                first, second = np.triu_indices(size, 1)
+                pairs.append(np.stack([members[:, first].ravel(), members[:, second].ravel()], axis=1))
 
-        # Iterate through each subvector string and its corresponding bucket
-        for bucket_index, subvector_string in enumerate(subvector_strings):
+            for start, size in zip(starts[sizes > self.max_bucket_size], sizes[sizes > self.max_bucket_size]):
+                members = order[start : start + size]
+                pairs.append(np.stack([np.full(size - 1, members[0]), members[1:]], axis=1))
 
-            # Join subvector elements into a comma-separated string as the key
-            subvector_string = ",".join(subvector_string)
+            if pairs:
+                yield np.concatenate(pairs).astype(np.int64)
 
-            # Check if the subvector string exists as a key in the current bucket
-            if subvector_string not in self.buckets[bucket_index]:
-                # Create an empty list to hold signatures associated with this subvector
-                self.buckets[bucket_index][subvector_string] = []
+    def candidate_pair_array(self):
+        """
+        Find the distinct candidate pairs of all bands.
 
-            # Append the current index counter to the list for this subvector string
-            self.buckets[bucket_index][subvector_string].append(self.index_counter)
+        Pairs are encoded as single int64 codes and deduplicated with np.unique band by
+        band, so memory is bounded by the number of distinct pairs.
 
-        # Increment the index counter for the next hash addition
-        self.index_counter += 1
+        Returns:
+        - np.ndarray: A sorted (m, 2) int64 array of distinct (i, j) pairs with i < j.
+        """
+        count = self.index_counter
+        codes = np.zeros(0, dtype=np.int64)
+        for pairs in self.iter_candidate_pairs():
+            codes = np.union1d(codes, pairs[:, 0] * count + pairs[:, 1])
+        return np.stack([codes // count, codes % count], axis=1)
 
     def find_candidate_pairs(self):
         """
@@ -217,123 +775,1043 @@ class LSH:
         Returns:
         - set: A set containing all candidate pairs.
         """
-        candidate_pairs = []
-
-        # Explore each band of buckets
-        for bucket_band in self.buckets:
-            # Extract individual buckets
-            keys = bucket_band.keys()
+        return set(map(tuple, self.candidate_pair_array().tolist()))
 
-            # Iterate through each bucket (list of associated indices)
-            for bucket in keys:
-                hits = bucket_band[bucket]
-                if len(hits) > 1:
-                    candidate_pairs.extend(combinations(hits, 2))
-        return set(candidate_pairs)
 
-
-class Metrics:
+class LSHIndex:
     """
-    This class provides methods for calculating Jaccard similarity and finding final education text indexes.
+    This class implements a persistent, incremental LSH index over texts.
+
+    Shingles are hashed to fixed 31-bit fingerprints and signed with seeded universal hash
+    functions, so nothing depends on a vocabulary: documents are added and removed
+    in O(H) without rehashing the rest of the corpus.
     """
 
-    @staticmethod
-    def jaccard_similarity(set_a: set, set_b: set):
+    def __init__(self, k=4, b=25, hash_functions_count=100, seed=0, words=False):
         """
-        Calculate the Jaccard similarity between two sets.
+        Initialize an empty LSH index.
 
         Args:
-        - set_a (set): The first set.
-        - set_b (set): The second set.
+        - k (int): The length of each shingle.
+        - b (int): The number of bands.
+        - hash_functions_count (int): The number of hash functions to use.
+        - seed (int): The seed of the hash functions.
+        - words (bool): Shingle words instead of characters.
+        """
+        assert hash_functions_count % b == 0
+        self.k = k
+        self.words = words
+        self.b = b
+        self.minhash = UniversalMinHash(hash_functions_count, seed=seed)
+        self.buckets = [{} for _ in range(b)]
+        self.signatures = {}
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.signatures
+
+    def shingle_ids(self, text: str):
+        """
+        Hash the shingles of a text to fixed 31-bit fingerprints.
+
+        Args:
+        - text (str): The input text.
 
         Returns:
-        - float: The Jaccard similarity.
+        - np.ndarray: The distinct shingle fingerprints of the text.
         """
-        intersection = len(set_a.intersection(set_b))
-        union = len(set_a.union(set_b))
-        jaccard_similarity = intersection / union
-        return jaccard_similarity
+        indices, _ = Shingling.fingerprint_sets([text], self.k, self.words)
+        return indices
 
-    @staticmethod
-    def find_final_education_indexes(
-        candidate_pairs: set, signatures: list, threshold: float
-    ) -> set:
+    def signature(self, text: str):
         """
-        Find final education text indexes based on candidate pairs and similarity threshold.
+        Generate the minhash signature of a text.
 
         Args:
-        - candidate_pairs (set): Set of candidate pairs, where each pair is a tuple of indices.
-        - signatures (list): List of MinHash signatures corresponding to texts.
-        - threshold (float): Similarity threshold.
+        - text (str): The input text.
 
         Returns:
-        - set: Set of final education text indexes.
+        - np.ndarray: The minhash signature.
         """
-        final_education_text_indexes = set()
-
-        # Iterate over candidate pairs and check similarity
-        for pair in candidate_pairs:
-            index_a, index_b = pair
-            if (
-                index_a not in final_education_text_indexes
-                or index_b not in final_education_text_indexes
-            ):
-                signature_a = signatures[index_a]
-                signature_b = signatures[index_b]
-                similarity = Metrics.jaccard_similarity(
-                    set(signature_a), set(signature_b)
-                )
-                if similarity >= threshold:
-                    final_education_text_indexes.update([index_a, index_b])
+        return self.minhash.minhash(self.shingle_ids(text))
 
-        return final_education_text_indexes
+    def band_keys(self, signature):
+        """
+        Split a signature into b bands, each hashed to an integer bucket key.
 
+        Args:
+        - signature (np.ndarray): The signature vector.
 
-def check_lsh_similarity(educations_list: list, k, b, threshold, hash_functions_count):
-    """
-    Check LSH similarity between education texts.
+        Returns:
+        - list: One bucket key per band.
+        """
+        return LSH.hash_bands(signature, self.b)[0].tolist()
 
-    Args:
-    - educations_list (list): List of education texts.
-    - k (int): The length of each shingle.
-    - b (int): The number of bands.
-    - threshold (float): Similarity threshold.
-    - hash_functions_count (int): The number of hash functions to use.
+    def add(self, doc_id, text: str):
+        """
+        Add a document to the index, replacing any document with the same id.
 
-    Returns:
-    - set: Set of final education text indexes.
-    """
-    shingles = []
-    for data in educations_list:
-        shingle_set = Shingling.shingle(data, k)
-        shingles.append(shingle_set)
+        A document without shingles is kept but not put into any bucket, since all
+        such documents have the same signature.
 
-    vocabulary = Shingling.create_vocabulary(shingles)
+        Args:
+        - doc_id: The id of the document.
+        - text (str): The document text.
+        """
+        if doc_id in self.signatures:
+            self.remove(doc_id)
+
+        shingle_ids = self.shingle_ids(text)
+        signature = self.minhash.minhash(shingle_ids)
+        self.signatures[doc_id] = signature
+        if len(shingle_ids) == 0:
+            return
+        for band, key in enumerate(self.band_keys(signature)):
+            self.buckets[band].setdefault(key, set()).add(doc_id)
+
+    def remove(self, doc_id):
+        """
+        Remove a document from the index.
 
-    shingles_onehot_encoding = []
-    for shingle_set in shingles:
-        onehot_encoding = Shingling.one_hot_encoding(shingle_set, vocabulary)
-        shingles_onehot_encoding.append(onehot_encoding)
+        Args:
+        - doc_id: The id of the document.
 
-    minhash_instance = MinHash(
-        vocabulary_size=len(vocabulary), hash_functions_count=hash_functions_count
-    )
-    signatures = []
-    for sparse_vector in shingles_onehot_encoding:
-        signature = minhash_instance.minhash(sparse_vector)
-        signatures.append(signature)
+        Raises:
+        - KeyError: If the document is not in the index.
+        """
+        signature = self.signatures.pop(doc_id)
+        if (signature == MERSENNE_PRIME).all():
+            # A document without shingles is in no bucket
+            return
+        for band, key in enumerate(self.band_keys(signature)):
+            bucket = self.buckets[band][key]
+            bucket.discard(doc_id)
+            if not bucket:
+                del self.buckets[band][key]
+
+    def query(self, text: str, threshold: float):
+        """
+        Find the indexed documents similar to a text.
 
-    lsh_instance = LSH(b=b)
-    for signature in signatures:
-        lsh_instance.add_signature_hash(signature)
+        Args:
+        - text (str): The query text.
+        - threshold (float): Similarity threshold.
 
-    candidate_pairs = lsh_instance.find_candidate_pairs()
+        Returns:
+        - list: (doc_id, similarity) tuples with an estimated Jaccard similarity of at least
+          threshold, most similar first. A text without shingles matches nothing.
+        """
+        shingle_ids = self.shingle_ids(text)
+        if len(shingle_ids) == 0:
+            return []
+        signature = self.minhash.minhash(shingle_ids)
+        candidates = set()
+        for band, key in enumerate(self.band_keys(signature)):
+            candidates.update(self.buckets[band].get(key, ()))
+
+        results = []
+        for doc_id in candidates:
+            similarity = float(np.mean(self.signatures[doc_id] == signature))
+            if similarity >= threshold:
+                results.append((doc_id, similarity))
+        results.sort(key=lambda result: result[1], reverse=True)
+        return results
+
+
+class LSHForest:
+    """
+    This class implements an LSH Forest: l prefix trees over disjoint slices of the
+    signatures, each stored as a sorted list of byte keys. A query descends from the
+    longest shared prefix to shorter ones until it has enough candidates, so one
+    index serves top-k queries at any similarity threshold.
+    """
 
-    final_education_list_indexes = Metrics.find_final_education_indexes(
-        candidate_pairs, signatures, threshold=threshold
-    )
+    def __init__(self, hash_functions_count=100, l=8):
+        """
+        Initialize an empty LSH Forest.
 
-    return final_education_list_indexes
+        Args:
+        - hash_functions_count (int): The length of the signatures.
+        - l (int): The number of prefix trees. Each tree uses hash_functions_count // l
+          signature positions as its maximal prefix length.
+        """
+        assert 0 < l <= hash_functions_count
+        self.l = l
+        self.prefix_length = hash_functions_count // l
+        self.hash_functions_count = hash_functions_count
+        self.pending = [[] for _ in range(l)]
+        self.tree_keys = [[] for _ in range(l)]
+        self.tree_docs = [[] for _ in range(l)]
+        self.signatures = {}
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.signatures
+
+    def tree_prefixes(self, signature):
+        """
+        Encode the slice of a signature used by every tree as a byte key.
+
+        Values are written big-endian, so byte order of the keys is the order of
+        the signature prefixes and every prefix of r values is r * 4 bytes.
+
+        Args:
+        - signature (np.ndarray): The signature vector.
+
+        Returns:
+        - list: One byte key per tree.
+        """
+        values = np.asarray(signature, dtype=">u4")[: self.l * self.prefix_length]
+        encoded = values.tobytes()
+        size = self.prefix_length * 4
+        return [encoded[tree * size : (tree + 1) * size] for tree in range(self.l)]
+
+    def add(self, doc_id, signature):
+        """
+        Add a document to the forest. Its keys are merged into the trees by the
+        next index() or query.
+
+        Args:
+        - doc_id: The id of the document.
+        - signature (np.ndarray): The minhash signature of the document.
+        """
+        if doc_id in self.signatures:
+            raise ValueError(f"Document {doc_id!r} is already in the forest")
+        signature = np.asarray(signature, dtype=np.uint32)
+        assert len(signature) == self.hash_functions_count
+        self.signatures[doc_id] = signature
+        for tree, key in enumerate(self.tree_prefixes(signature)):
+            self.pending[tree].append((key, doc_id))
+
+    def index(self):
+        """
+        Merge the added documents into the sorted keys of every tree.
+
+        Only the pending keys are sorted. A few of them are inserted by bisection,
+        and more are merged with the keys of the tree in one linear pass.
+        """
+        for tree in range(self.l):
+            if not self.pending[tree]:
+                continue
+            pending = sorted(self.pending[tree], key=lambda entry: entry[0])
+            keys, docs = self.tree_keys[tree], self.tree_docs[tree]
+            if len(pending) <= FOREST_INSERT_SIZE:
+                for key, doc_id in pending:
+                    i = bisect_right(keys, key)
+                    keys.insert(i, key)
+                    docs.insert(i, doc_id)
+            else:
+                entries = list(heapq.merge(zip(keys, docs), pending, key=lambda entry: entry[0]))
+                self.tree_keys[tree] = [key for key, _ in entries]
+                self.tree_docs[tree] = [doc_id for _, doc_id in entries]
+            self.pending[tree] = []
+
+    def candidates(self, signature, k: int):
+        """
+        Collect the documents sharing the longest possible prefixes with a signature.
+
+        The prefix length r goes down from the maximal prefix length until at least
+        k documents share a prefix of length r with the signature in some tree.
+
+        Args:
+        - signature (np.ndarray): The query signature.
+        - k (int): The number of documents wanted.
+
+        Returns:
+        - set: The ids of the candidate documents.
+        """
+        if any(self.pending):
+            self.index()
+        prefixes = self.tree_prefixes(signature)
+        candidates = set()
+        for r in range(self.prefix_length, 0, -1):
+            for tree, prefix in enumerate(prefixes):
+                keys = self.tree_keys[tree]
+                low = bisect_left(keys, prefix[: r * 4])
+                # Every key with this prefix sorts at or below the prefix padded with 0xff
+                high = bisect_right(keys, prefix[: r * 4] + b"\xff" * (len(prefix) - r * 4), low)
+                candidates.update(self.tree_docs[tree][low:high])
+            if len(candidates) >= k:
+                break
+        return candidates
+
+    def query(self, signature, k: int):
+        """
+        Find the top-k indexed documents most similar to a signature.
+
+        Args:
+        - signature (np.ndarray): The query signature.
+        - k (int): The number of documents to return.
+
+        Returns:
+        - list: Up to k (doc_id, similarity) tuples, most similar first, where the
+          similarity is the fraction of agreeing signature positions.
+        """
+        if k <= 0:
+            return []
+        signature = np.asarray(signature, dtype=np.uint32)
+        candidates = list(self.candidates(signature, k))
+        if not candidates:
+            return []
+
+        matrix = np.stack([self.signatures[doc_id] for doc_id in candidates])
+        similarities = (matrix == signature).mean(axis=1)
+        top = np.argsort(-similarities, kind="stable")[:k]
+        return [(candidates[i], float(similarities[i])) for i in top]
+
+
+class SignatureStore:
+    """
+    This class holds the MinHash signatures of a whole dataset, computed once: an
+    (n_docs, H) uint32 matrix whose row i is the signature of document (row id) i.
+    The matrix is persisted as a .npy file and memory-mapped when loaded, so spatial
+    queries only gather the rows of their results instead of re-signing them.
+    With b-bit MinHash the rows are packed b-bit signatures instead, and since a
+    packed row cannot tell whether its document has shingles, a mask of the
+    documents without shingles is saved next to it.
+    """
+
+    def __init__(self, signatures, bbit=None, empty=None):
+        """
+        Initialize the store from a signature matrix.
+
+        Args:
+        - signatures (np.ndarray): The (n_docs, H) signature matrix, or the
+          (n_docs, words) matrix of packed signatures if bbit is given.
+        - bbit (BBitMinHash): The packing of b-bit signatures, or None.
+        - empty (np.ndarray): Which documents have no shingles. Required with bbit;
+          without it, they are recognised by their all-MERSENNE_PRIME signature.
+        """
+        self.signatures = signatures
+        self.bbit = bbit
+        self.empty = empty
+
+    def __len__(self):
+        return len(self.signatures)
+
+    @staticmethod
+    def path_for(csv_file_path: str, k: int, hash_functions_count: int, seed: int, words: bool = False, bits=None):
+        """
+        Build the file name of the store of a dataset for the given parameters.
+
+        Args:
+        - csv_file_path (str): The path of the dataset.
+        - k (int): The length of each shingle.
+        - hash_functions_count (int): The number of hash functions.
+        - seed (int): The seed of the hash functions.
+        - words (bool): Whether the shingles are words instead of characters.
+        - bits (int): The bits kept of each value with b-bit MinHash, or None.
+
+        Returns:
+        - str: The path of the .npy file, next to the dataset.
+        """
+        root, _ = os.path.splitext(csv_file_path)
+        unit = "w" if words else "c"
+        packing = f".b{bits}" if bits else ""
+        return f"{root}.{unit}{k}.h{hash_functions_count}.s{seed}{packing}.signatures.npy"
+
+    @staticmethod
+    def empty_path(path: str):
+        """
+        Build the file name of the mask of documents without shingles of a store.
+
+        Args:
+        - path (str): The path of the .npy file of the store.
+
+        Returns:
+        - str: The path of the .npy file of the mask.
+        """
+        return path[: -len(".signatures.npy")] + ".empty.signatures.npy"
+
+    @classmethod
+    def build(cls, texts: list, k: int, hash_functions_count: int, seed: int = 0, words: bool = False, bits=None, processes=1):
+        """
+        Sign every text of a dataset.
+
+        Args:
+        - texts (list): The texts, in row id order.
+        - k (int): The length of each shingle.
+        - hash_functions_count (int): The number of hash functions to use.
+        - seed (int): The seed of the hash functions.
+        - words (bool): Shingle words instead of characters.
+        - bits (int): Keep only this many bits of each value (b-bit MinHash), or None.
+        - processes (int): The number of signing processes, or None for one per CPU.
+
+        Returns:
+        - SignatureStore: The store of the dataset.
+        """
+        indices, offsets = Shingling.fingerprint_sets(texts, k, words)
+        minhash_instance = UniversalMinHash(hash_functions_count, seed=seed)
+        signatures = minhash_instance.parallel_signatures(indices, offsets, processes)
+        empty = np.diff(offsets) == 0
+        if bits is None:
+            return cls(signatures, empty=empty)
+
+        bbit = BBitMinHash(bits, hash_functions_count)
+        return cls(bbit.pack(signatures), bbit, empty)
+
+    @classmethod
+    def load(cls, path: str, bbit=None):
+        """
+        Memory-map a store saved with save().
+
+        Args:
+        - path (str): The path of the .npy file.
+        - bbit (BBitMinHash): The packing of the signatures if they are b-bit, or None.
+
+        Returns:
+        - SignatureStore: The store.
+        """
+        empty = None if bbit is None else np.load(cls.empty_path(path))
+        return cls(np.load(path, mmap_mode="r"), bbit, empty)
+
+    @classmethod
+    def load_or_build(
+        cls, csv_file_path: str, texts: list, k: int, hash_functions_count: int, seed: int = 0, words: bool = False, bits=None, processes=1
+    ):
+        """
+        Load the store of a dataset, building and saving it first if it is missing,
+        older than the dataset or of the wrong shape.
+
+        Args:
+        - csv_file_path (str): The path of the dataset the texts were read from.
+        - texts (list): The texts, in row id order.
+        - k (int): The length of each shingle.
+        - hash_functions_count (int): The number of hash functions to use.
+        - seed (int): The seed of the hash functions.
+        - words (bool): Shingle words instead of characters.
+        - bits (int): Keep only this many bits of each value (b-bit MinHash), or None.
+        - processes (int): The number of signing processes, or None for one per CPU.
+
+        Returns:
+        - SignatureStore: The store of the dataset.
+        """
+        path = cls.path_for(csv_file_path, k, hash_functions_count, seed, words, bits)
+        bbit = None if bits is None else BBitMinHash(bits, hash_functions_count)
+        width = hash_functions_count if bbit is None else bbit.words
+        saved = os.path.exists(path) and (bbit is None or os.path.exists(cls.empty_path(path)))
+        if saved and os.path.getmtime(path) >= os.path.getmtime(csv_file_path):
+            store = cls.load(path, bbit)
+            if store.signatures.shape == (len(texts), width):
+                return store
+
+        store = cls.build(texts, k, hash_functions_count, seed, words, bits, processes)
+        store.save(path)
+        return cls.load(path, bbit)
+
+    def save(self, path: str):
+        """
+        Save the signature matrix as a .npy file, and with b-bit MinHash the mask
+        of documents without shingles.
+
+        Args:
+        - path (str): The path of the .npy file.
+        """
+        if self.bbit is not None:
+            np.save(self.empty_path(path), np.asarray(self.empty))
+        np.save(path, np.asarray(self.signatures))
+
+    def rows(self, row_ids):
+        """
+        Gather the signatures of some documents.
+
+        Args:
+        - row_ids (list): The row ids of the documents.
+
+        Returns:
+        - np.ndarray: A (len(row_ids), H) signature matrix, or packed signature
+          matrix, in the order of row_ids.
+        """
+        return np.asarray(self.signatures[np.asarray(row_ids, dtype=np.intp)])
+
+    def shingled(self, row_ids):
+        """
+        Tell which of some documents have at least one shingle.
+
+        Args:
+        - row_ids (list): The row ids of the documents.
+
+        Returns:
+        - np.ndarray: A boolean mask in the order of row_ids.
+        """
+        row_ids = np.asarray(row_ids, dtype=np.intp)
+        if self.empty is not None:
+            return ~np.asarray(self.empty)[row_ids]
+        return ~(self.rows(row_ids) == MERSENNE_PRIME).all(axis=1)
+
+
+class Metrics:
+    """
+    This class provides methods for calculating Jaccard similarity and finding final education text indexes.
+    """
+
+    @staticmethod
+    def jaccard_similarity(set_a: set, set_b: set):
+        """
+        Calculate the Jaccard similarity between two sets.
+
+        Args:
+        - set_a (set): The first set.
+        - set_b (set): The second set.
+
+        Returns:
+        - float: The Jaccard similarity.
+        """
+        intersection = len(set_a.intersection(set_b))
+        union = len(set_a.union(set_b))
+        jaccard_similarity = intersection / union
+        return jaccard_similarity
+
+    @staticmethod
+    def estimated_similarities(pairs, signatures):
+        """
+        Estimate the Jaccard similarity of many pairs from their MinHash signatures.
+
+        The estimate of a pair is the fraction of signature positions on which the
+        two signatures agree. Pairs are compared in blocks of VERIFY_BLOCK_SIZE positions.
+
+        Args:
+        - pairs (np.ndarray): A (m, 2) array of document indexes.
+        - signatures (np.ndarray): The (documents, hash_functions_count) signature matrix.
+
+        Returns:
+        - np.ndarray: The m estimated similarities.
+        """
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        signatures = np.asarray(signatures)
+        similarities = np.empty(len(pairs))
+        block_pairs = max(1, VERIFY_BLOCK_SIZE // max(1, signatures.shape[1]))
+
+        for start in range(0, len(pairs), block_pairs):
+            block = pairs[start : start + block_pairs]
+            agree = signatures[block[:, 0]] == signatures[block[:, 1]]
+            similarities[start : start + len(block)] = agree.mean(axis=1)
+
+        return similarities
+
+    @staticmethod
+    def exact_similarities(pairs, indices, offsets):
+        """
+        Calculate the exact Jaccard similarity of many pairs from their sorted shingle ids.
+
+        The shingle ids of both documents of every pair are gathered, tagged with the
+        pair number and sorted together; since the ids of a document are unique, the
+        size of the intersection is the number of adjacent equal entries.
+
+        Args:
+        - pairs (np.ndarray): A (m, 2) array of document indexes.
+        - indices (np.ndarray): The concatenated shingle ids of all documents.
+        - offsets (np.ndarray): The start of each document in indices, plus the total length.
+
+        Returns:
+        - np.ndarray: The m exact Jaccard similarities. Two empty documents have similarity 0.
+        """
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        indices = np.asarray(indices, dtype=np.int64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        lengths = np.diff(offsets)
+        similarities = np.zeros(len(pairs))
+        ends = np.cumsum(lengths[pairs[:, 0]] + lengths[pairs[:, 1]])
+
+        start = 0
+        while start < len(pairs):
+            # Take as many pairs as fit in the block, at least one
+            done = ends[start - 1] if start else 0
+            stop = np.searchsorted(ends, done + VERIFY_BLOCK_SIZE, side="right")
+            stop = max(int(stop), start + 1)
+            block = pairs[start:stop]
+
+            # Positions in indices of the ids of every document in the block
+            documents = block.ravel()
+            counts = lengths[documents]
+            first = np.repeat(offsets[documents] - np.cumsum(counts) + counts, counts)
+            positions = first + np.arange(counts.sum())
+
+            # Key every id with its pair number, so one sort groups all pairs
+            pair_numbers = np.repeat(np.arange(len(block)), counts[0::2] + counts[1::2])
+            keys = np.sort((pair_numbers << 32) | indices[positions])
+            duplicates = keys[1:] == keys[:-1]
+            intersections = np.bincount(keys[1:][duplicates] >> 32, minlength=len(block))
+
+            unions = counts[0::2] + counts[1::2] - intersections
+            similarities[start:stop] = np.divide(
+                intersections, unions, out=np.zeros(len(block)), where=unions > 0
+            )
+            start = stop
+
+        return similarities
+
+    @staticmethod
+    def verify_candidate_pairs(candidate_pairs, signatures, threshold: float, indices=None, offsets=None, bbit=None):
+        """
+        Verify all candidate pairs at once against the similarity threshold.
+
+        Pairs are first filtered on their estimated similarity. If the shingle ids of the
+        documents are given, the remaining pairs are re-checked with their exact Jaccard similarity.
+
+        Args:
+        - candidate_pairs (np.ndarray or set): The (i, j) candidate pairs.
+        - signatures (np.ndarray): The (documents, hash_functions_count) signature matrix.
+        - threshold (float): Similarity threshold.
+        - indices (np.ndarray): Optional concatenated shingle ids of all documents.
+        - offsets (np.ndarray): The start of each document in indices, plus the total length.
+        - bbit (BBitMinHash): If given, signatures are b-bit signatures packed by it.
+
+        Returns:
+        - tuple: The set of final education text indexes, and a structured array of the
+          verified pairs with fields a, b, estimated and exact (NaN if not re-checked).
+        """
+        if isinstance(candidate_pairs, (set, frozenset)):
+            candidate_pairs = sorted(candidate_pairs)
+        pairs = np.asarray(candidate_pairs, dtype=np.int64).reshape(-1, 2)
+
+        if bbit is None:
+            estimated = Metrics.estimated_similarities(pairs, signatures)
+        else:
+            estimated = bbit.similarities(pairs, signatures)
+        keep = estimated >= threshold
+        pairs, estimated = pairs[keep], estimated[keep]
+
+        exact = np.full(len(pairs), np.nan)
+        if indices is not None:
+            exact = Metrics.exact_similarities(pairs, indices, offsets)
+            keep = exact >= threshold
+            pairs, estimated, exact = pairs[keep], estimated[keep], exact[keep]
+
+        scored_pairs = np.empty(len(pairs), dtype=SCORED_PAIR_DTYPE)
+        scored_pairs["a"], scored_pairs["b"] = pairs[:, 0], pairs[:, 1]
+        scored_pairs["estimated"], scored_pairs["exact"] = estimated, exact
+
+        return set(np.unique(pairs).tolist()), scored_pairs
+
+    @staticmethod
+    def find_final_education_indexes(
+        candidate_pairs: set, signatures: list, threshold: float
+    ) -> set:
+        """
+        Find final education text indexes based on candidate pairs and similarity threshold.
+
+        Args:
+        - candidate_pairs (set): Set of candidate pairs, where each pair is a tuple of indices.
+        - signatures (list): List of MinHash signatures corresponding to texts.
+        - threshold (float): Similarity threshold.
+
+        Returns:
+        - set: Set of final education text indexes.
+        """
+        final_education_text_indexes, _ = Metrics.verify_candidate_pairs(
+            candidate_pairs, signatures, threshold
+        )
+        return final_education_text_indexes
+
+
+class DisjointSet:
+    """
+    This class implements an array-backed disjoint-set (union-find) structure over
+    the integers 0..size-1, with path halving and union by size.
+    """
+
+    def __init__(self, size: int):
+        """
+        Initialize the DisjointSet object with every element in its own set.
+
+        Args:
+        - size (int): The number of elements.
+        """
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def __len__(self):
+        return len(self.parent)
+
+    def find(self, x: int):
+        """
+        Find the representative of the set containing an element.
+
+        Args:
+        - x (int): The element.
+
+        Returns:
+        - int: The representative element of its set.
+        """
+        parent = self.parent
+        while parent[x] != x:
+            # Path halving: point every other node to its grandparent
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int):
+        """
+        Merge the sets containing two elements.
+
+        Args:
+        - a (int): The first element.
+        - b (int): The second element.
+
+        Returns:
+        - bool: True if the two elements were in different sets.
+        """
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return True
+
+    def union_pairs(self, pairs):
+        """
+        Merge the sets of the two elements of every pair.
+
+        Args:
+        - pairs (np.ndarray): A (m, 2) array of elements.
+        """
+        for a, b in np.asarray(pairs, dtype=np.int64).reshape(-1, 2).tolist():
+            self.union(a, b)
+
+    def labels(self):
+        """
+        Label every element with the number of its set.
+
+        Sets are numbered 0, 1, ... in order of their smallest element.
+
+        Returns:
+        - np.ndarray: The set label of every element.
+        """
+        roots = np.array([self.find(x) for x in range(len(self.parent))], dtype=np.int64)
+        _, first, labels = np.unique(roots, return_index=True, return_inverse=True)
+        # Renumber the sets in order of their smallest element
+        rank = np.empty(len(first), dtype=np.int64)
+        rank[np.argsort(first, kind="stable")] = np.arange(len(first))
+        return rank[labels]
+
+
+def collision_probability(similarity, b: int, r: int):
+    """
+    Calculate the probability that two documents become a candidate pair.
+
+    With b bands of r rows, a pair of Jaccard similarity s shares at least one
+    band bucket with probability 1 - (1 - s^r)^b, the S-curve of LSH.
+
+    Args:
+    - similarity (float or np.ndarray): The Jaccard similarity of the pair.
+    - b (int): The number of bands.
+    - r (int): The number of rows of each band.
+
+    Returns:
+    - float or np.ndarray: The probability of the pair being a candidate.
+    """
+    return 1 - (1 - np.asarray(similarity, dtype=float) ** r) ** b
+
+
+def false_positive_probability(threshold: float, b: int, r: int):
+    """
+    Integrate the S-curve below the threshold, the area of pairs that become
+    candidates although they are not similar enough.
+
+    Args:
+    - threshold (float): Similarity threshold.
+    - b (int or np.ndarray): The number of bands, or an (n, 1) array of them.
+    - r (int or np.ndarray): The number of rows of each band, or an (n, 1) array of them.
+
+    Returns:
+    - float or np.ndarray: The false positive area, for every (b, r) if arrays are given.
+    """
+    similarities = np.linspace(0.0, threshold, INTEGRATION_POINTS)
+    probabilities = collision_probability(similarities, b, r)
+    areas = np.sum((probabilities[..., 1:] + probabilities[..., :-1]) / 2 * np.diff(similarities), axis=-1)
+    return float(areas) if np.ndim(areas) == 0 else areas
+
+
+def false_negative_probability(threshold: float, b: int, r: int):
+    """
+    Integrate the complement of the S-curve above the threshold, the area of
+    similar pairs that never become candidates.
+
+    Args:
+    - threshold (float): Similarity threshold.
+    - b (int or np.ndarray): The number of bands, or an (n, 1) array of them.
+    - r (int or np.ndarray): The number of rows of each band, or an (n, 1) array of them.
+
+    Returns:
+    - float or np.ndarray: The false negative area, for every (b, r) if arrays are given.
+    """
+    similarities = np.linspace(threshold, 1.0, INTEGRATION_POINTS)
+    probabilities = 1 - collision_probability(similarities, b, r)
+    areas = np.sum((probabilities[..., 1:] + probabilities[..., :-1]) / 2 * np.diff(similarities), axis=-1)
+    return float(areas) if np.ndim(areas) == 0 else areas
+
+
+@lru_cache(maxsize=None)
+def tune_lsh_parameters(threshold: float, hash_functions_count: int, false_positive_weight=0.5, false_negative_weight=0.5):
+    """
+    Choose the number of bands and rows that minimise the weighted false positive
+    and false negative areas of the S-curve for a similarity threshold.
+
+    Every (b, r) with b * r <= hash_functions_count is considered; the signature
+    positions beyond b * r are left out of the banding. The result only depends on
+    the arguments, so it is cached and repeated queries do not integrate again;
+    all settings are integrated at once on a first call.
+
+    Args:
+    - threshold (float): Similarity threshold.
+    - hash_functions_count (int): The number of hash functions of the signatures.
+    - false_positive_weight (float): The weight of a false positive.
+    - false_negative_weight (float): The weight of a false negative.
+
+    Returns:
+    - tuple: The number of bands b and the number of rows r of each band.
+    """
+    settings = np.array(
+        [(b, r) for b in range(1, hash_functions_count + 1) for r in range(1, hash_functions_count // b + 1)]
+    )
+    bands, rows = settings[:, :1], settings[:, 1:]
+    errors = false_positive_weight * false_positive_probability(
+        threshold, bands, rows
+    ) + false_negative_weight * false_negative_probability(threshold, bands, rows)
+    best = int(np.argmin(errors))
+    return int(settings[best, 0]), int(settings[best, 1])
+
+
+def band_parameters(b, threshold: float, hash_functions_count: int):
+    """
+    Resolve the bands and rows to use, tuning them when no number of bands is given.
+
+    Args:
+    - b (int): The number of bands, or None to tune it for the threshold.
+    - threshold (float): Similarity threshold.
+    - hash_functions_count (int): The number of hash functions of the signatures.
+
+    Returns:
+    - tuple: The number of bands b and the number of rows r of each band.
+    """
+    if b is None:
+        return tune_lsh_parameters(threshold, hash_functions_count)
+    return b, hash_functions_count // b
+
+
+def banded_candidate_pairs(signatures, b: int, r: int, documents=None):
+    """
+    Band the signatures of some documents and find their candidate pairs.
+
+    Every document without shingles has the same all-MERSENNE_PRIME signature, so
+    callers leave such documents out instead of matching them with each other.
+
+    Args:
+    - signatures (np.ndarray): The (documents, H) signature matrix.
+    - b (int): The number of bands.
+    - r (int): The number of rows of each band.
+    - documents (np.ndarray): The sorted indexes of the documents to band, by default all.
+
+    Returns:
+    - np.ndarray: A sorted (m, 2) int64 array of (i, j) pairs of indexes into signatures, with i < j.
+    """
+    if documents is None:
+        documents = np.arange(len(signatures))
+    if len(documents) < 2:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    lsh_instance = LSH(b=b)
+    lsh_instance.add_signatures(signatures[documents, : b * r])
+    return documents[lsh_instance.candidate_pair_array()]
+
+
+def find_similar_pairs(educations_list: list, k, b, threshold, hash_functions_count, seed=None, exact=False, processes=1):
+    """
+    Find the verified similar pairs of education texts in one LSH pass.
+
+    Args:
+    - educations_list (list): List of education texts.
+    - k (int): The length of each shingle.
+    - b (int): The number of bands, or None to tune it for the threshold.
+    - threshold (float): Similarity threshold.
+    - hash_functions_count (int): The number of hash functions to use.
+    - seed (int): Optional seed of the hash functions.
+    - exact (bool): Re-check the pairs with their exact Jaccard similarity.
+    - processes (int): The number of signing processes, or None for one per CPU.
+
+    Returns:
+    - np.ndarray: The verified pairs, as returned by Metrics.verify_candidate_pairs.
+    """
+    indices, offsets = Shingling.fingerprint_sets(educations_list, k)
+
+    minhash_instance = UniversalMinHash(
+        hash_functions_count=hash_functions_count, seed=seed
+    )
+    signatures = minhash_instance.parallel_signatures(indices, offsets, processes)
+
+    b, r = band_parameters(b, threshold, hash_functions_count)
+    shingled = np.flatnonzero(np.diff(offsets))
+    candidate_pairs = banded_candidate_pairs(signatures, b, r, shingled)
+
+    if not exact:
+        indices = offsets = None
+    _, scored_pairs = Metrics.verify_candidate_pairs(
+        candidate_pairs, signatures, threshold, indices, offsets
+    )
+
+    return scored_pairs
+
+
+def check_lsh_similarity(educations_list: list, k, b, threshold, hash_functions_count, seed=None, exact=False, processes=1):
+    """
+    Check LSH similarity between education texts.
+
+    Args:
+    - educations_list (list): List of education texts.
+    - k (int): The length of each shingle.
+    - b (int): The number of bands, or None to tune it for the threshold.
+    - threshold (float): Similarity threshold.
+    - hash_functions_count (int): The number of hash functions to use.
+    - seed (int): Optional seed of the hash functions.
+    - exact (bool): Re-check the pairs with their exact Jaccard similarity.
+    - processes (int): The number of signing processes, or None for one per CPU.
+
+    Returns:
+    - set: Set of final education text indexes.
+    """
+    scored_pairs = find_similar_pairs(
+        educations_list, k, b, threshold, hash_functions_count, seed=seed, exact=exact, processes=processes
+    )
+
+    final_education_list_indexes = set(scored_pairs["a"].tolist()) | set(scored_pairs["b"].tolist())
+
+    return final_education_list_indexes
+
+
+def cluster_lsh_similarity(educations_list: list, k, b, threshold, hash_functions_count, seed=None, exact=False, processes=1):
+    """
+    Cluster education texts into groups of near-duplicates.
+
+    The verified similar pairs are merged with a disjoint-set, so texts are in the same
+    cluster when they are linked by a chain of similar pairs.
+
+    Args:
+    - educations_list (list): List of education texts.
+    - k (int): The length of each shingle.
+    - b (int): The number of bands, or None to tune it for the threshold.
+    - threshold (float): Similarity threshold.
+    - hash_functions_count (int): The number of hash functions to use.
+    - seed (int): Optional seed of the hash functions.
+    - exact (bool): Re-check the pairs with their exact Jaccard similarity.
+    - processes (int): The number of signing processes, or None for one per CPU.
+
+    Returns:
+    - np.ndarray: The cluster label of every education text. Texts without a similar
+      text are in a cluster of their own.
+    """
+    scored_pairs = find_similar_pairs(
+        educations_list, k, b, threshold, hash_functions_count, seed=seed, exact=exact, processes=processes
+    )
+
+    clusters = DisjointSet(len(educations_list))
+    clusters.union_pairs(np.stack([scored_pairs["a"], scored_pairs["b"]], axis=1))
+
+    return clusters.labels()
+
+
+def benchmark_lsh_parameters(educations_list: list, k, threshold, hash_functions_count, settings=None, seed=None):
+    """
+    Measure the recall, candidate count and wall time of LSH band settings.
+
+    The signatures are computed once and shared by all settings. The true similar
+    pairs are found by brute force over the exact Jaccard similarity of all pairs.
+
+    Args:
+    - educations_list (list): List of education texts.
+    - k (int): The length of each shingle.
+    - threshold (float): Similarity threshold.
+    - hash_functions_count (int): The number of hash functions to use.
+    - settings (list): Optional (b, r) settings to measure. By default every number
+      of bands dividing hash_functions_count, and the tuned setting.
+    - seed (int): Optional seed of the hash functions.
+
+    Returns:
+    - list: A dict per setting with the keys b, r, candidates, found, similar, recall and seconds.
+    """
+    indices, offsets = Shingling.fingerprint_sets(educations_list, k)
+    signatures = UniversalMinHash(hash_functions_count, seed=seed).signatures(indices, offsets)
+    shingled = np.flatnonzero(np.diff(offsets))
+
+    all_pairs = np.stack(np.triu_indices(len(educations_list), k=1), axis=1)
+    exact = Metrics.exact_similarities(all_pairs, indices, offsets)
+    similar = all_pairs[exact >= threshold]
+    similar_codes = similar[:, 0] * len(educations_list) + similar[:, 1]
+
+    if settings is None:
+        settings = [
+            (b, hash_functions_count // b)
+            for b in range(1, hash_functions_count + 1)
+            if hash_functions_count % b == 0
+        ]
+        tuned = tune_lsh_parameters(threshold, hash_functions_count)
+        if tuned not in settings:
+            settings.append(tuned)
+
+    results = []
+    for b, r in settings:
+        start_time = time.perf_counter()
+        candidate_pairs = banded_candidate_pairs(signatures, b, r, shingled)
+        _, scored_pairs = Metrics.verify_candidate_pairs(
+            candidate_pairs, signatures, threshold, indices, offsets
+        )
+        seconds = time.perf_counter() - start_time
+
+        found_codes = scored_pairs["a"] * len(educations_list) + scored_pairs["b"]
+        found = len(np.intersect1d(found_codes, similar_codes))
+        results.append(
+            {
+                "b": b,
+                "r": r,
+                "candidates": len(candidate_pairs),
+                "found": found,
+                "similar": len(similar),
+                "recall": found / len(similar) if len(similar) else 1.0,
+                "seconds": seconds,
+            }
+        )
+
+    return results
+
+
+def check_lsh_similarity_in_store(store: SignatureStore, row_ids: list, b, threshold):
+    """
+    Check LSH similarity between documents whose signatures are already in a store.
+
+    Only the signature rows of the given documents are gathered and banded; no
+    shingling or MinHash is done per query.
+
+    Args:
+    - store (SignatureStore): The signature store of the dataset.
+    - row_ids (list): The row ids of the documents to compare.
+    - b (int): The number of bands, or None to tune it for the threshold.
+    - threshold (float): Similarity threshold.
+
+    Returns:
+    - set: Set of final indexes into row_ids.
+    """
+    signatures = store.rows(row_ids)
+
+    if store.bbit is None:
+        values, band_threshold = signatures, threshold
+    else:
+        # b-bit values also agree by chance, which shifts the S-curve
+        values, band_threshold = store.bbit.unpack(signatures), store.bbit.agreement(threshold)
+
+    b, r = band_parameters(b, band_threshold, values.shape[1])
+    shingled = np.flatnonzero(store.shingled(row_ids))
+    candidate_pairs = banded_candidate_pairs(values, b, r, shingled)
+
+    final_indexes, _ = Metrics.verify_candidate_pairs(
+        candidate_pairs, signatures, threshold, bbit=store.bbit
+    )
+    return final_indexes
 
 
 # For testing purposes
@@ -23,7 +23,7 @@ def main():
     simil_thresh = 0.60
     start_time = time.time()
     similar_education_indexes = LSH.check_lsh_similarity(
-        points, k=3, b=6, threshold=simil_thresh, hash_functions_count=12
+        points, k=3, b=None, threshold=simil_thresh, hash_functions_count=12
     )
     lshend_time = time.time()
     lsh_time = lshend_time - start_time
@@ -43,6 +43,42 @@ def main():
    
     
 
+def benchmark():
+    """Reports the recall, candidate count and wall time of every LSH band setting
+    on the datasets, for each similarity threshold in use.
+    """
+
+    datasets = [
+        (r".\Data\Tasting_LSH.csv", 3, 12),
+        (r".\Data\new_computer_scientists_data.csv", 4, 100),
+    ]
+
+    for csv_file_path, k, hash_functions_count in datasets:
+        educations = []
+        with open(csv_file_path, "r", encoding="utf-8") as file:
+            reader = csv.DictReader(file)
+            for row in reader:
+                if row["Education"] != "":
+                    educations.append(row["Education"])
+
+        for simil_thresh in (0.5, 0.6, 0.9):
+            tuned = LSH.tune_lsh_parameters(simil_thresh, hash_functions_count)
+            print(f"\n{csv_file_path}, threshold {simil_thresh}, tuned (b, r): {tuned}")
+            print(f"{'b':>4} {'r':>4} {'candidates':>11} {'found':>6} {'similar':>8} {'recall':>7} {'time (s)':>9}")
+
+            results = LSH.benchmark_lsh_parameters(
+                educations, k, simil_thresh, hash_functions_count, seed=0
+            )
+            for result in results:
+                print(
+                    f"{result['b']:>4} {result['r']:>4} {result['candidates']:>11} {result['found']:>6} "
+                    f"{result['similar']:>8} {result['recall']:>7.3f} {result['seconds']:>9.4f}"
+                )
+
+
 if __name__ == "__main__":
-    main()  
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        main()  
 
@@ -1,7 +1,512 @@
+import heapq
 import numpy as np
 import csv
-from sklearn.feature_extraction.text import TfidfVectorizer
-from scipy.sparse import csr_matrix
+
+# scipy and sklearn are imported by the functions that use them, so importing this
+# module stays cheap
+
+# Hash codes are int64, one bit per hyperplane
+MAX_PLANES = 62
+# Size of the hashed feature space of streaming TF-IDF
+STREAMING_FEATURES = 1 << 16
+
+
+class StreamingTfidf:
+    """
+    This class implements a vocabulary-free TF-IDF vectorizer for streams of texts.
+
+    Terms are hashed into a fixed feature space with a HashingVectorizer, so the
+    features never change, and the document frequencies are counted batch by batch.
+    A batch is weighted with the inverse document frequencies of everything seen so
+    far, using the same smoothed idf as TfidfVectorizer.
+    """
+
+    def __init__(self, n_features=STREAMING_FEATURES, **hashing_options):
+        """
+        Initialize the StreamingTfidf object with no documents seen.
+
+        Args:
+        - n_features (int): The size of the hashed feature space.
+        - hashing_options: Further options of the HashingVectorizer, e.g. ngram_range.
+        """
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.hashing = HashingVectorizer(
+            n_features=n_features, alternate_sign=False, norm=None, **hashing_options
+        )
+        self.document_frequencies = np.zeros(n_features, dtype=np.int64)
+        self.documents = 0
+
+    def partial_fit(self, texts):
+        """
+        Count the documents of a batch of texts in the document frequencies.
+
+        Args:
+        - texts (list): The texts of the batch.
+
+        Returns:
+        - StreamingTfidf: The updated object.
+        """
+        from scipy.sparse import csr_matrix
+
+        counts = csr_matrix(self.hashing.transform(texts))
+        counts.sum_duplicates()
+        # Every stored entry of a row is one term of one document
+        self.document_frequencies += np.bincount(counts.indices, minlength=len(self.document_frequencies))
+        self.documents += counts.shape[0]
+        return self
+
+    def transform(self, texts):
+        """
+        Vectorize texts with the current inverse document frequencies.
+
+        Args:
+        - texts (list): The texts.
+
+        Returns:
+        - scipy.sparse.csr_matrix: The L2-normalised (texts, n_features) TF-IDF matrix.
+        """
+        from scipy.sparse import csr_matrix
+        from sklearn.preprocessing import normalize
+
+        counts = csr_matrix(self.hashing.transform(texts), dtype=np.float64)
+        idf = np.log((1 + self.documents) / (1 + self.document_frequencies)) + 1
+        return normalize(counts.multiply(idf).tocsr())
+
+    def fit_transform(self, texts):
+        """
+        Count a batch of texts and vectorize it.
+
+        Args:
+        - texts (list): The texts of the batch.
+
+        Returns:
+        - scipy.sparse.csr_matrix: The L2-normalised TF-IDF matrix of the batch.
+        """
+        return self.partial_fit(texts).transform(texts)
+
+
+class RandomProjectionLSH:
+    """
+    This class implements random projection LSH (SimHash) for cosine similarity.
+
+    Every hash table has num_planes random hyperplanes. A document is hashed to one
+    integer code per table, whose bit j is set when the document lies on the positive
+    side of plane j. All planes of all tables are stacked into one matrix, so a whole
+    TF-IDF matrix is hashed with a single sparse-dense product.
+
+    Added batches are kept as separate blocks and every table is a dict from hash
+    code to the chunks of document indexes added to that bucket, so adding a batch
+    only hashes and groups the batch itself. Blocks and chunks are merged on demand.
+    """
+
+    def __init__(self, num_planes=2, num_hash_tables=6, seed=None):
+        """
+        Initialize the RandomProjectionLSH object.
+
+        Args:
+        - num_planes (int): The number of random hyperplanes of each hash table.
+        - num_hash_tables (int): The number of hash tables.
+        - seed (int): Optional seed of the random hyperplanes.
+        """
+        assert 0 < num_planes <= MAX_PLANES
+        self.num_planes = num_planes
+        self.num_hash_tables = num_hash_tables
+        self.rng = np.random.default_rng(seed)
+        self.planes = None
+        self.blocks = []
+        self.offsets = [0]
+        self.tables = []
+        self.vectorizer = None
+
+    @property
+    def tf_idf(self):
+        """
+        The (documents, features) TF-IDF matrix of all added documents.
+        """
+        return self.stacked()[0]
+
+    @property
+    def norms(self):
+        """
+        The L2 norm of every added document.
+        """
+        return self.stacked()[1]
+
+    def fit(self, tf_idf, vectorizer=None):
+        """
+        Draw the random hyperplanes and hash every document of a corpus into the tables.
+
+        Args:
+        - tf_idf (scipy.sparse matrix): The (documents, features) TF-IDF matrix.
+        - vectorizer (TfidfVectorizer or StreamingTfidf): Optional fitted vectorizer of
+          the corpus, used to vectorize query texts.
+
+        Returns:
+        - RandomProjectionLSH: The fitted object.
+        """
+        self.planes = None
+        self.vectorizer = vectorizer
+        return self.add(tf_idf)
+
+    def add(self, tf_idf):
+        """
+        Hash a batch of new documents into the tables, after the documents already added.
+
+        The hyperplanes are drawn on the first batch, so every batch must have the same
+        feature space, as the output of a StreamingTfidf has. A batch that cannot be
+        hashed leaves the tables unchanged.
+
+        Args:
+        - tf_idf (scipy.sparse matrix): The (documents, features) TF-IDF matrix of the batch.
+
+        Returns:
+        - RandomProjectionLSH: The updated object.
+
+        Raises:
+        - ValueError: If the batch has a different number of features than the first batch.
+        """
+        from scipy.sparse import csr_matrix
+
+        tf_idf = csr_matrix(tf_idf)
+        if self.planes is None:
+            self.planes = self.rng.standard_normal(
+                (tf_idf.shape[1], self.num_hash_tables * self.num_planes)
+            )
+            self.blocks, self.offsets = [], [0]
+            self.tables = [{} for _ in range(self.num_hash_tables)]
+        elif tf_idf.shape[1] != self.planes.shape[0]:
+            raise ValueError(
+                f"The batch has {tf_idf.shape[1]} features but the tables were built "
+                f"with {self.planes.shape[0]}"
+            )
+
+        codes = self.hash_codes(tf_idf)
+        norms = np.sqrt(np.asarray(tf_idf.multiply(tf_idf).sum(axis=1)).ravel())
+        start = self.offsets[-1]
+        self.blocks.append((tf_idf, norms))
+        self.offsets.append(start + tf_idf.shape[0])
+        for table, buckets in enumerate(self.tables):
+            bucket_codes, starts, order = self.group_buckets(codes[:, table])
+            members = order + start
+            for code, low, high in zip(bucket_codes.tolist(), starts[:-1].tolist(), starts[1:].tolist()):
+                buckets.setdefault(code, []).append(members[low:high])
+        return self
+
+    def stacked(self):
+        """
+        Merge the added blocks into one TF-IDF matrix and one array of norms.
+
+        Returns:
+        - tuple: The (documents, features) TF-IDF matrix and the norms, or (None, None)
+          before the first batch.
+        """
+        from scipy.sparse import vstack
+
+        if not self.blocks:
+            return None, None
+        if len(self.blocks) > 1:
+            tf_idf = vstack([block for block, _ in self.blocks], format="csr")
+            norms = np.concatenate([norms for _, norms in self.blocks])
+            self.blocks = [(tf_idf, norms)]
+            self.offsets = [0, tf_idf.shape[0]]
+        return self.blocks[0]
+
+    def rows(self, documents):
+        """
+        Gather the TF-IDF vectors and norms of some documents from the added blocks,
+        without merging the blocks.
+
+        Args:
+        - documents (np.ndarray): The indexes of the documents.
+
+        Returns:
+        - tuple: The (documents, features) TF-IDF matrix and the norms of the documents.
+        """
+        from scipy.sparse import vstack
+
+        documents = np.asarray(documents, dtype=np.int64)
+        if len(self.blocks) == 1:
+            tf_idf, norms = self.blocks[0]
+            return tf_idf[documents], norms[documents]
+
+        order = np.argsort(documents, kind="stable")
+        sorted_documents = documents[order]
+        bounds = np.searchsorted(sorted_documents, self.offsets).tolist()
+        parts = [
+            (tf_idf[sorted_documents[low:high] - start], norms[sorted_documents[low:high] - start])
+            for (tf_idf, norms), start, low, high in zip(self.blocks, self.offsets, bounds, bounds[1:])
+            if high > low
+        ]
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order))
+        tf_idf = vstack([part for part, _ in parts], format="csr")[inverse]
+        norms = np.concatenate([norms for _, norms in parts])[inverse]
+        return tf_idf, norms
+
+    def partial_fit(self, texts, vectorizer=None):
+        """
+        Add a batch of texts: update the document frequencies of the streaming
+        vectorizer, vectorize the batch and hash it into the tables. Documents added
+        earlier keep the vectors of their own batch.
+
+        Only a StreamingTfidf can be updated this way: refitting a TfidfVectorizer
+        would change its vocabulary, and so the feature space of the hyperplanes.
+
+        Args:
+        - texts (list): The texts of the batch.
+        - vectorizer (StreamingTfidf): The streaming vectorizer. A new one is created
+          if neither this nor fit() gave one.
+
+        Returns:
+        - RandomProjectionLSH: The updated object.
+
+        Raises:
+        - ValueError: If the vectorizer is not a StreamingTfidf.
+        """
+        if vectorizer is None:
+            vectorizer = self.vectorizer if self.vectorizer is not None else StreamingTfidf()
+        if not isinstance(vectorizer, StreamingTfidf):
+            raise ValueError(
+                f"partial_fit() needs a StreamingTfidf, not a {type(vectorizer).__name__}; "
+                "use add() with vectors of the same features"
+            )
+        self.vectorizer = vectorizer
+        return self.add(vectorizer.fit_transform(texts))
+
+    def project(self, tf_idf):
+        """
+        Project documents on the hyperplanes of all hash tables.
+
+        Args:
+        - tf_idf (scipy.sparse matrix): A (documents, features) TF-IDF matrix.
+
+        Returns:
+        - np.ndarray: A (documents, num_hash_tables, num_planes) matrix of projections.
+        """
+        from scipy.sparse import csr_matrix
+
+        projections = np.asarray(csr_matrix(tf_idf) @ self.planes)
+        return projections.reshape(-1, self.num_hash_tables, self.num_planes)
+
+    def codes_of(self, projections):
+        """
+        Pack the signs of projections into one integer code per hash table.
+
+        Args:
+        - projections (np.ndarray): A (documents, num_hash_tables, num_planes) matrix of projections.
+
+        Returns:
+        - np.ndarray: A (documents, num_hash_tables) int64 matrix of hash codes.
+        """
+        weights = np.left_shift(1, np.arange(self.num_planes, dtype=np.int64))
+        return (projections >= 0) @ weights
+
+    def hash_codes(self, tf_idf):
+        """
+        Hash documents to one integer code per hash table.
+
+        Args:
+        - tf_idf (scipy.sparse matrix): A (documents, features) TF-IDF matrix.
+
+        Returns:
+        - np.ndarray: A (documents, num_hash_tables) int64 matrix of hash codes.
+        """
+        return self.codes_of(self.project(tf_idf))
+
+    def probe_codes(self, projections, probes=0):
+        """
+        Choose the buckets to probe for one vector: its own bucket in every table, and
+        the probes most likely other buckets.
+
+        A bucket reached by flipping a set of bits is scored by the sum of the magnitudes
+        of their projections, since a small projection means the vector is close to that
+        hyperplane. Flip sets are generated in increasing score over all tables with a
+        heap: from a set whose largest flipped bit (in order of magnitude) is j, the next
+        sets replace j by j + 1 (shift) or add j + 1 (expand).
+
+        Args:
+        - projections (np.ndarray): The (num_hash_tables, num_planes) projections of the vector.
+        - probes (int): The number of extra buckets to probe.
+
+        Returns:
+        - list: (table, code) tuples of the buckets to probe.
+        """
+        codes = self.codes_of(projections)
+        magnitudes = np.abs(projections)
+        order = np.argsort(magnitudes, axis=1, kind="stable")
+        costs = np.take_along_axis(magnitudes, order, axis=1)
+
+        buckets = [(table, int(code)) for table, code in enumerate(codes)]
+        heap = [(costs[table, 0], table, (0,)) for table in range(self.num_hash_tables)]
+        heapq.heapify(heap)
+        while heap and len(buckets) < self.num_hash_tables + probes:
+            score, table, flips = heapq.heappop(heap)
+            mask = sum(1 << int(order[table, j]) for j in flips)
+            buckets.append((table, int(codes[table]) ^ mask))
+
+            last = flips[-1]
+            if last + 1 < self.num_planes:
+                shifted = score - costs[table, last] + costs[table, last + 1]
+                heapq.heappush(heap, (shifted, table, flips[:-1] + (last + 1,)))
+                heapq.heappush(heap, (score + costs[table, last + 1], table, flips + (last + 1,)))
+        return buckets
+
+    @staticmethod
+    def group_buckets(codes):
+        """
+        Group documents by their hash code in one hash table.
+
+        Args:
+        - codes (np.ndarray): The hash code of every document in the table.
+
+        Returns:
+        - tuple: (bucket_codes, starts, order), where the documents of the bucket with
+          code bucket_codes[i] are order[starts[i]:starts[i + 1]].
+        """
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        first = np.flatnonzero(np.diff(sorted_codes)) + 1
+        starts = np.concatenate(([0], first, [len(codes)]))
+        return sorted_codes[starts[:-1]], starts, order
+
+    def bucket(self, table: int, code: int):
+        """
+        Find the documents with a hash code in a hash table.
+
+        Args:
+        - table (int): The hash table.
+        - code (int): The hash code.
+
+        Returns:
+        - np.ndarray: The sorted indexes of the documents in the bucket.
+        """
+        chunks = self.tables[table].get(code)
+        if chunks is None:
+            return np.zeros(0, dtype=np.int64)
+        if len(chunks) > 1:
+            # Chunks of later batches hold later documents, so they stay sorted
+            chunks[:] = [np.concatenate(chunks)]
+        return chunks[0]
+
+    def vector(self, doc_or_text):
+        """
+        Get the TF-IDF vector of a corpus document, a text or a vector.
+
+        Args:
+        - doc_or_text (int, str or scipy.sparse matrix): The index of a document of the
+          corpus, a text to vectorize, or a (1, features) TF-IDF vector.
+
+        Returns:
+        - scipy.sparse.csr_matrix: The (1, features) TF-IDF vector.
+        """
+        from scipy.sparse import csr_matrix
+
+        if isinstance(doc_or_text, (int, np.integer)):
+            return self.rows([int(doc_or_text)])[0]
+        if isinstance(doc_or_text, str):
+            if self.vectorizer is None:
+                raise ValueError("Querying a text needs the vectorizer passed to fit()")
+            return csr_matrix(self.vectorizer.transform([doc_or_text]))
+        return csr_matrix(doc_or_text)
+
+    def cosine_similarities(self, documents, vector):
+        """
+        Calculate the cosine similarity of some corpus documents with a vector.
+
+        Args:
+        - documents (np.ndarray): The indexes of the documents.
+        - vector (scipy.sparse matrix): The (1, features) vector.
+
+        Returns:
+        - np.ndarray: The cosine similarity of every document.
+        """
+        tf_idf, norms = self.rows(documents)
+        dots = np.asarray((tf_idf @ vector.T).todense()).ravel()
+        norms = norms * np.sqrt(vector.multiply(vector).sum())
+        return np.divide(dots, norms, out=np.zeros(len(documents)), where=norms > 0)
+
+    def query(self, doc_or_text, k=10, threshold=0.0, probes=0):
+        """
+        Find the top-k corpus documents most similar to a document or text.
+
+        The candidates of all hash tables are merged without duplicates and scored
+        with one sparse product. A corpus document is not returned for itself.
+        With multi-probe, the probes most likely neighbouring buckets are searched too,
+        which gives the recall of more hash tables without building them.
+
+        Args:
+        - doc_or_text (int, str or scipy.sparse matrix): The query, see vector().
+        - k (int): The number of documents to return.
+        - threshold (float): The minimum cosine similarity.
+        - probes (int): The number of extra buckets to probe, over all tables.
+
+        Returns:
+        - list: Up to k (document index, cosine similarity) tuples, most similar first.
+        """
+        vector = self.vector(doc_or_text)
+        buckets = self.probe_codes(self.project(vector)[0], probes)
+        candidates = np.unique(np.concatenate([self.bucket(table, code) for table, code in buckets]))
+        if isinstance(doc_or_text, (int, np.integer)):
+            candidates = candidates[candidates != doc_or_text]
+        if k <= 0 or len(candidates) == 0:
+            return []
+
+        similarities = self.cosine_similarities(candidates, vector)
+        keep = similarities >= threshold
+        candidates, similarities = candidates[keep], similarities[keep]
+
+        top = np.argsort(-similarities, kind="stable")[:k]
+        return [(int(candidates[i]), float(similarities[i])) for i in top]
+
+    def candidate_pairs(self):
+        """
+        Find the distinct pairs of documents sharing a bucket in some hash table.
+
+        Buckets of the same size are expanded together into all their pairs, and the
+        pairs of all tables are deduplicated as single int64 codes.
+
+        Returns:
+        - np.ndarray: A sorted (m, 2) int64 array of distinct (i, j) pairs with i < j.
+        """
+        count = self.offsets[-1]
+        codes = []
+        for table, buckets in enumerate(self.tables):
+            members = [self.bucket(table, code) for code in buckets]
+            if not members:
+                continue
+            sizes = np.array([len(bucket) for bucket in members])
+            starts = np.concatenate(([0], np.cumsum(sizes)))
+            order = np.concatenate(members)
+            for size in np.unique(sizes[sizes > 1]):
+                first = starts[:-1][sizes == size]
+                members = np.sort(order[first[:, None] + np.arange(size)], axis=1)
+                rows, columns = np.triu_indices(size, k=1)
+                codes.append((members[:, rows] * count + members[:, columns]).ravel())
+
+        codes = np.unique(np.concatenate(codes)) if codes else np.zeros(0, dtype=np.int64)
+        return np.stack([codes // count, codes % count], axis=1)
+
+    def similar_pairs(self, threshold):
+        """
+        Find all pairs of corpus documents with a cosine similarity of at least threshold.
+
+        Every unordered pair is reported once, and all candidate pairs are scored at once.
+
+        Args:
+        - threshold (float): The minimum cosine similarity.
+
+        Returns:
+        - tuple: A (m, 2) array of (i, j) pairs with i < j, and their cosine similarities.
+        """
+        pairs = self.candidate_pairs()
+        tf_idf, norms = self.stacked()
+        dots = np.asarray(tf_idf[pairs[:, 0]].multiply(tf_idf[pairs[:, 1]]).sum(axis=1)).ravel()
+        norms = norms[pairs[:, 0]] * norms[pairs[:, 1]]
+        similarities = np.divide(dots, norms, out=np.zeros(len(pairs)), where=norms > 0)
+
+        keep = similarities >= threshold
+        return pairs[keep], similarities[keep]
 
 # Function to read 'education' data from CSV
 def read_education_data_from_csv(file_path):
@@ -13,71 +518,45 @@ def read_education_data_from_csv(file_path):
             education_data.append(education)
     return education_data
 
-# Read the 'education' data from the csv file
-csv_file_path = r"Data\Tasting_LSH.csv"
-education_data = read_education_data_from_csv(csv_file_path)
+# Function to find most similar texts based on LSH and threshold
+def find_most_similar_texts(lsh, education_data, threshold):
+    pairs, _ = lsh.similar_pairs(threshold)
+    return [(education_data[i], education_data[j]) for i, j in pairs.tolist()]
+
 
-vectorizer = TfidfVectorizer()
-tf_idf = csr_matrix(vectorizer.fit_transform(education_data))
+def main():
+    from sklearn.feature_extraction.text import TfidfVectorizer
 
-# LSH Implementation
-num_planes = 2  # Number of random hyperplanes
-hash_tables = []
-random_vectors_list = []  # Store random_vectors for each hash table
+    # Read the 'education' data from the csv file
+    csv_file_path = r"Data\Tasting_LSH.csv"
+    education_data = read_education_data_from_csv(csv_file_path)
 
-# Create multiple hash tables (for better results)
-num_hash_tables = 6
+    vectorizer = TfidfVectorizer()
+    tf_idf = vectorizer.fit_transform(education_data)
 
-for _ in range(num_hash_tables):
-    # Generate random planes separately for each hash table
-    random_vectors = np.random.randn(num_planes, tf_idf.shape[1])
-    random_vectors_list.append(random_vectors)
-    hash_table = {}
-    hash_tables.append(hash_table)
+    # LSH Implementation
+    num_planes = 2  # Number of random hyperplanes
 
-    # Hash documents into buckets
-    for i, doc in enumerate(tf_idf):
-        projections = np.dot(doc.toarray(), random_vectors.T)
-        hash_value = tuple(['1' if p >= 0 else '0' for p in projections[0]])  # Convert to tuple
+    # Create multiple hash tables (for better results)
+    num_hash_tables = 6
 
-        if hash_value not in hash_table:
-            hash_table[hash_value] = []
-        hash_table[hash_value].append(i)
+    # Hash all documents into buckets
+    lsh = RandomProjectionLSH(num_planes, num_hash_tables).fit(tf_idf, vectorizer)
 
-# Function to find most similar texts based on LSH and threshold
-def find_most_similar_texts(threshold):
-    similar_texts = []
-
-    for i in range(len(education_data)):
-        for hash_table, random_vectors in zip(hash_tables, random_vectors_list):
-            query_projections = np.dot(tf_idf[i].toarray(), random_vectors.T)
-            query_hash_value = tuple(['1' if p >= 0 else '0' for p in query_projections[0]])
-
-            if query_hash_value in hash_table:
-                results = hash_table[query_hash_value]
-                for doc_index in results:
-                    if doc_index != i:
-                        similarity = np.dot(tf_idf[i].toarray(), tf_idf[doc_index].toarray().T)
-                        cosine_similarity = similarity[0, 0]  # Assuming both matrices are 1x1
-                        if cosine_similarity >= threshold:
-                            similar_texts.append((education_data[i], education_data[doc_index]))
-
-    return similar_texts
-
-# Examplea
-threshold = 0.2
-similar_texts = find_most_similar_texts(threshold)
-# Convert pairs to frozensets and add to set to remove duplicates
-unique_similar_texts = set(frozenset(pair) for pair in similar_texts)
-
-# Convert frozensets back to pairs
-unique_similar_texts = [tuple(pair) for pair in unique_similar_texts]
-
-print(f"Unique pairs of similar education data above threshold {threshold}:")
-for education_text_pair in unique_similar_texts:
-    print(education_text_pair)
-
-print(f"Number of unique pairs of similar education data above threshold {threshold}: {len(unique_similar_texts)}")
+    # Examplea
+    threshold = 0.2
+    # Every unordered pair is found once
+    unique_similar_texts = find_most_similar_texts(lsh, education_data, threshold)
+
+    print(f"Unique pairs of similar education data above threshold {threshold}:")
+    for education_text_pair in unique_similar_texts:
+        print(education_text_pair)
+
+    print(f"Number of unique pairs of similar education data above threshold {threshold}: {len(unique_similar_texts)}")
+
+
+if __name__ == "__main__":
+    main()
 
 
 # Unique pairs of similar education data above threshold 0.6:
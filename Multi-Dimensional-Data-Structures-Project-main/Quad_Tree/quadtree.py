@@ -2,6 +2,8 @@ import csv
 import sys
 import time
 
+import numpy as np
+
 class Scientist:
     """Represents a scientist with their surname, awards, education, and DBLP record.
     """
@@ -49,6 +51,7 @@ class Node():
         self.depth = d
         self.scientists = scientists
         self.children = []
+        self.center = None  # Split point, set once the node is subdivided
 
     def get_width(self):
         """Returns the width of the node."""
@@ -66,128 +69,229 @@ class Node():
         """Returns the list of scientists contained within the node."""
         return self.scientists
 
-def recursive_subdivide(node, surname_range, awards_threshold, dblp_range):
-    """Recursively subdivides a quadtree node into smaller segments.
+    def is_leaf(self):
+        """Returns True if the node has not been subdivided."""
+        return not self.children
+
+    def extend(self, key):
+        """Grows the node's box so that it contains a point.
+
+        Args:
+            key: The (x, y, z) key of the point.
+        """
+        x1 = max(self.x0 + self.width, key[0])
+        y1 = max(self.y0 + self.height, key[1])
+        z1 = max(self.z0 + self.depth, key[2])
+        self.x0 = min(self.x0, key[0])
+        self.y0 = min(self.y0, key[1])
+        self.z0 = min(self.z0, key[2])
+        self.width = x1 - self.x0
+        self.height = y1 - self.y0
+        self.depth = z1 - self.z0
+
+
+BUCKET_CAPACITY = 2  # Default number of scientists a leaf holds before it is split
+MAX_DEPTH = 16  # Guards against endless subdivision of duplicate points
+SPLIT_RULES = ("midpoint", "median")
+
 
-    This function subdivides a node until it contains a small enough
-    number of scientists or cannot be subdivided further. Filtering based
-    on surname, awards and DBLP record is included.
+def scientist_keys(scientists):
+    """Builds the key columns used to place scientists in the octree.
 
     Args:
-        node: The Node object to subdivide.
-        surname_range: A tuple containing the starting and ending letters 
-            of the surname range for filtering.
-        awards_threshold: The minimum number of awards for a scientist
-            to be included.
-        dblp_range: A tuple containing the minimum and maximum DBLP
-            records for a scientist to be included.
+        scientists: A list of Scientist objects.
 
     Returns:
-         A list of Node objects representing the leaf node segments.
+        An (n, 3) NumPy array holding the ordinal of the first surname
+        letter, the awards and the DBLP record of each scientist.
     """
-   
-    if len(node.scientists) <= 2:
-        return [node]  # Return the current node as a segment
+    keys = np.empty((len(scientists), 3), dtype=float)
+    for i, scientist in enumerate(scientists):
+        keys[i, 0] = ord(scientist.surname[0]) if scientist.surname else 0
+        keys[i, 1] = scientist.awards
+        keys[i, 2] = scientist.dblp_record
+    return keys
 
-    # Filtering scientists based on user-defined criteria
-    filtered_scientists = [s for s in node.scientists if
-                           ord(surname_range[0]) <= ord(s.surname[0]) <= ord(surname_range[1]) and
-                           s.awards > awards_threshold and
-                           dblp_range[0] <= s.dblp_record <= dblp_range[1]]
 
-    if len(filtered_scientists) == 0:
-        return [node] # Return the current node as a segment
-    # Divide Node into 8 smaller nodes
-    w_ = float(node.width / 2)
-    h_ = float(node.height / 2)
-    d_ = float(node.depth / 2)
+def octant(key, center):
+    """Returns the octant code of a single point, as in `partition_octants`.
 
-    p = contains(node.x0, node.y0, node.z0, w_, h_, d_, filtered_scientists)
-    x1 = Node(node.x0, node.y0, node.z0, w_, h_, d_, p)
-    children1 = recursive_subdivide(x1, surname_range, awards_threshold, dblp_range)
+    Args:
+        key: The (x, y, z) key of the point.
+        center: The (x, y, z) split point of the node.
 
-    p = contains(node.x0, node.y0 + h_, node.z0, w_, h_, d_, filtered_scientists)
-    x2 = Node(node.x0, node.y0 + h_, node.z0, w_, h_, d_, p)
-    children2 = recursive_subdivide(x2, surname_range, awards_threshold, dblp_range)
+    Returns:
+        The index of the child of the node that holds the point.
+    """
+    return int(key[1] >= center[1]) | int(key[0] >= center[0]) << 1 | int(key[2] >= center[2]) << 2
 
-    p = contains(node.x0 + w_, node.y0, node.z0, w_, h_, d_, filtered_scientists)
-    x3 = Node(node.x0 + w_, node.y0, node.z0, w_, h_, d_, p)
-    children3 = recursive_subdivide(x3, surname_range, awards_threshold, dblp_range)
 
-    p = contains(node.x0 + w_, node.y0 + h_, node.z0, w_, h_, d_, filtered_scientists)
-    x4 = Node(node.x0 + w_, node.y0 + h_, node.z0, w_, h_, d_, p)
-    children4 = recursive_subdivide(x4, surname_range, awards_threshold, dblp_range)
+def collect_scientists(node):
+    """Returns every scientist stored in the leaves below a node."""
+    if node.is_leaf():
+        return list(node.get_scientists())
+    scientists = []
+    for child in node.children:
+        scientists += collect_scientists(child)
+    return scientists
 
-    p = contains(node.x0, node.y0, node.z0 + d_, w_, h_, d_, filtered_scientists)
-    x5 = Node(node.x0, node.y0, node.z0 + d_, w_, h_, d_, p)
-    children5 = recursive_subdivide(x5, surname_range, awards_threshold, dblp_range)
 
-    p = contains(node.x0, node.y0 + h_, node.z0 + d_, w_, h_, d_, filtered_scientists)
-    x6 = Node(node.x0, node.y0 + h_, node.z0 + d_, w_, h_, d_, p)
-    children6 = recursive_subdivide(x6, surname_range, awards_threshold, dblp_range)
+def partition_octants(keys, center):
+    """Partitions points into the eight octants around a center in one pass.
 
-    p = contains(node.x0 + w_, node.y0, node.z0 + d_, w_, h_, d_, filtered_scientists)
-    x7 = Node(node.x0 + w_, node.y0, node.z0 + d_, w_, h_, d_, p)
-    children7 = recursive_subdivide(x7, surname_range, awards_threshold, dblp_range)
+    Every point gets its octant code computed once, from the half-open
+    comparisons key >= center on each axis, so a point on a boundary
+    belongs to exactly one octant. The codes are then grouped with a
+    single stable counting sort.
 
-    p = contains(node.x0 + w_, node.y0 + h_, node.z0 + d_, w_, h_, d_, filtered_scientists)
-    x8 = Node(node.x0 + w_, node.y0 + h_, node.z0 + d_, w_, h_, d_, p)
-    children8 = recursive_subdivide(x8, surname_range, awards_threshold, dblp_range)
+    The octant code sets bit 0 for the upper half of the awards axis,
+    bit 1 for the surname axis and bit 2 for the DBLP axis, matching the
+    order of a node's children.
 
-    node.children = [x1, x2, x3, x4, x5, x6, x7, x8]
-    return [node] + children1 + children2 + children3 + children4 + children5 + children6 + children7 + children8
+    Args:
+        keys: An (n, 3) NumPy array of point keys.
+        center: The (x, y, z) split point of the node.
+
+    Returns:
+        A tuple (order, offsets) where the indices of the points in octant i
+        are order[offsets[i]:offsets[i + 1]].
+    """
+    codes = (keys[:, 1] >= center[1]).astype(np.uint8)
+    codes |= (keys[:, 0] >= center[0]).astype(np.uint8) << 1
+    codes |= (keys[:, 2] >= center[2]).astype(np.uint8) << 2
 
+    offsets = np.zeros(9, dtype=np.intp)
+    np.cumsum(np.bincount(codes, minlength=8), out=offsets[1:])
+    order = np.argsort(codes, kind="stable")
+    return order, offsets
 
 
-def contains(x, y, z, w, h, d, scientists):
-    """Checks if any scientists fall within a given region of the space.
+def split_point(node, keys, split="midpoint"):
+    """Chooses the point around which a node is divided into octants.
 
     Args:
-        x: The x-coordinate of the region's lower-left corner.
-        y: The y-coordinate of the region's lower-left corner.
-        z: The z-coordinate of the region's lower-left corner.
-        w: The width of the region.
-        h: The height of the region.
-        d: The depth of the region.
-        scientists: A list of Scientist objects.
+        node: The Node object to subdivide.
+        keys: The key columns of the node's scientists.
+        split: "midpoint" halves the node's box on every axis; "median"
+            splits every axis at the median of the node's points (PR-kd
+            style), so the tree depth follows the data distribution.
+
+    Returns:
+        The (x, y, z) split point.
+    """
+    if split == "midpoint":
+        return (node.x0 + node.width / 2, node.y0 + node.height / 2, node.z0 + node.depth / 2)
+
+    center = np.median(keys, axis=0)
+    low = keys.min(axis=0)
+    # A median equal to the minimum would send every point to the upper half
+    stuck = center <= low
+    center[stuck] = (low[stuck] + keys.max(axis=0)[stuck]) / 2
+    return tuple(center)
+
+
+def recursive_subdivide(node, capacity=BUCKET_CAPACITY, max_depth=MAX_DEPTH, level=0, keys=None, split="midpoint"):
+    """Recursively subdivides a quadtree node into smaller segments.
+
+    This function subdivides a node until it contains at most `capacity`
+    scientists or reaches `max_depth`. No query filtering takes place
+    here, so the resulting tree indexes every scientist and can answer
+    any number of queries. Scientists are only kept in the leaves; the
+    list of a node is handed over to its children once it is split.
+
+    Args:
+        node: The Node object to subdivide.
+        capacity: The maximum number of scientists stored in a leaf.
+        max_depth: The maximum level of a leaf in the tree.
+        level: The level of the node in the tree (the root is at level 0).
+        keys: The key columns of the node's scientists, as returned by
+            `scientist_keys`. Computed when not given.
+        split: The split rule, "midpoint" or "median" (see `split_point`).
 
     Returns:
-        A list of Scientist objects that fall within the specified region.
+         A list of Node objects representing the leaf node segments.
     """
-    scientists_inside = []
-    for scientist in scientists:
-        first_char = ord(scientist.surname[0]) if scientist.surname else 0
-        if x <= first_char <= x + w and \
-           y <= scientist.awards <= y + h and \
-           z <= scientist.dblp_record <= z + d:
-            scientists_inside.append(scientist)
-    return scientists_inside
+   
+    if len(node.scientists) <= capacity or level >= max_depth:
+        return [node]  # Return the current node as a segment
+
+    if keys is None:
+        keys = scientist_keys(node.scientists)
+
+    if not np.ptp(keys, axis=0).any():
+        return [node]  # Identical points cannot be separated
+
+    # Divide Node into 8 smaller nodes around the split point
+    node.center = split_point(node, keys, split)
+    order, offsets = partition_octants(keys, node.center)
+
+    lower = (node.x0, node.y0, node.z0)
+    upper = (node.x0 + node.width, node.y0 + node.height, node.z0 + node.depth)
+
+    segments = []
+    for code in range(8):
+        # Octant bits: 0 -> awards (y), 1 -> surname (x), 2 -> DBLP (z)
+        corner, far_corner = [], []
+        for axis, bit in ((0, 1), (1, 0), (2, 2)):
+            if code >> bit & 1:
+                corner.append(node.center[axis])
+                far_corner.append(upper[axis])
+            else:
+                corner.append(lower[axis])
+                far_corner.append(node.center[axis])
+
+        indexes = order[offsets[code]:offsets[code + 1]]
+        child = Node(
+            corner[0], corner[1], corner[2],
+            far_corner[0] - corner[0], far_corner[1] - corner[1], far_corner[2] - corner[2],
+            [node.scientists[i] for i in indexes],
+        )
+        node.children.append(child)
+        segments += recursive_subdivide(child, capacity, max_depth, level + 1, keys[indexes], split)
+
+    node.scientists = []  # Internal nodes do not store scientists
+    return segments
 
 
 class QTree():
     """A quadtree data structure for efficient multi-dimensional spatial queries.
+
+    The tree is built once over every scientist and is not tied to any
+    query, so the same tree answers any number of `query_quadtree` calls.
+
+    Scientists added before the first build are kept in `scientists` and
+    indexed in bulk by `subdivide`. Once the tree is built, `insert` and
+    `remove` update it in place: a leaf is split when it goes over
+    `capacity`, and sibling leaves are merged back into their parent when
+    together they hold no more than `merge_threshold` scientists.
     """
-    def __init__(self, surname_range, awards_threshold, dblp_range, scientists=None):
+    def __init__(self, scientists=None, capacity=BUCKET_CAPACITY, max_depth=MAX_DEPTH, split="midpoint",
+                 merge_threshold=None):
         """Initializes a QuadTree object.
 
         Args:
-            surname_range: A tuple typw of containing the starting and ending letters 
-                 of the surname range.
-            awards_threshold: The minimum number of awards for scientists.
-            dblp_range: A tuple containing the minimum and maximum DBLP
-                records for scientists.
             scientists: An optional initial list of Scientist objects.
+            capacity: The maximum number of scientists stored in a leaf.
+            max_depth: The maximum level of a leaf in the tree.
+            split: How nodes are divided into octants, "midpoint" or
+                "median" (see `split_point`).
+            merge_threshold: The number of scientists at or below which
+                sibling leaves are merged. Defaults to half the capacity,
+                so that a merged leaf does not split again on the next insert.
         """
 
-        self.surname_range = surname_range
-        self.awards_threshold = awards_threshold
-        self.dblp_range = dblp_range
+        if split not in SPLIT_RULES:
+            raise ValueError(f"Unknown split rule {split!r}, expected one of {SPLIT_RULES}")
 
         if scientists is None:
             scientists = []
 
         self.scientists = scientists
-        self.root = Node(0, 0, 0, 1000, 1000, 1000, self.scientists)
+        self.capacity = capacity
+        self.max_depth = max_depth
+        self.split = split
+        self.merge_threshold = capacity // 2 if merge_threshold is None else merge_threshold
+        self.root = None  # Built by subdivide()
 
     def add_scientist(self, surname, awards, education, dblp_record):
         """Adds a new scientist to the quadtree.
@@ -199,7 +303,68 @@ class QTree():
             dblp_record: The scientist's DBLP publication record.
         """
 
-        self.scientists.append(Scientist(surname, awards, education, dblp_record))
+        self.insert(Scientist(surname, awards, education, dblp_record))
+
+    def insert(self, scientist):
+        """Inserts a scientist into the quadtree in O(depth).
+
+        The scientist is routed down to its leaf, growing the boxes on the
+        way if it lies outside them, and the leaf is split if it goes over
+        capacity. Before the tree is built the scientist is only kept for
+        the bulk build.
+
+        Args:
+            scientist: The Scientist object to insert.
+        """
+        if self.root is None:
+            self.scientists.append(scientist)
+            return
+
+        key = scientist_keys([scientist])[0].tolist()
+        node, level = self.root, 0
+        while True:
+            node.extend(key)
+            if node.is_leaf():
+                break
+            node = node.children[octant(key, node.center)]
+            level += 1
+
+        node.scientists.append(scientist)
+        if len(node.scientists) > self.capacity and level < self.max_depth:
+            recursive_subdivide(node, self.capacity, self.max_depth, level, split=self.split)
+
+    def remove(self, scientist):
+        """Removes a scientist from the quadtree in O(depth).
+
+        Sibling leaves that underflow after the removal are merged back into
+        their parent, level by level.
+
+        Args:
+            scientist: The Scientist object to remove.
+
+        Raises:
+            ValueError: If the scientist is not in the quadtree.
+        """
+        if self.root is None:
+            self.scientists.remove(scientist)
+            return
+
+        key = scientist_keys([scientist])[0].tolist()
+        path = [self.root]
+        while not path[-1].is_leaf():
+            path.append(path[-1].children[octant(key, path[-1].center)])
+
+        path[-1].scientists.remove(scientist)
+
+        for parent in reversed(path[:-1]):
+            if not all(child.is_leaf() for child in parent.children):
+                break
+            scientists = collect_scientists(parent)
+            if len(scientists) > self.merge_threshold:
+                break
+            parent.scientists = scientists
+            parent.children = []
+            parent.center = None
 
     def load_scientists_from_csv(self, csv_file):
         """Loads scientists from a CSV file into the quadtree.
@@ -231,8 +396,26 @@ class QTree():
                 self.add_scientist(surname, int(awards), education, int(dblp_record))
 
     def subdivide(self):
-        """Subdivides the quadtree recursively based on filtering criteria."""
-        recursive_subdivide(self.root, self.surname_range, self.awards_threshold, self.dblp_range)
+        """Builds the quadtree by subdividing it recursively over all scientists.
+
+        Calling it again rebuilds the tree in bulk from its current contents.
+        """
+        if self.root is not None:
+            self.scientists = collect_scientists(self.root)
+        keys = scientist_keys(self.scientists)
+
+        # The root box is the bounding box of the data, with its own extent
+        # on every axis, so no scientist falls outside it and no subdivision
+        # is spent on empty space
+        if len(keys):
+            low, high = keys.min(axis=0), keys.max(axis=0)
+        else:
+            low = high = np.zeros(3)
+        extent = high - low
+
+        self.root = Node(low[0], low[1], low[2], extent[0], extent[1], extent[2], self.scientists)
+        recursive_subdivide(self.root, self.capacity, self.max_depth, keys=keys, split=self.split)
+        self.scientists = []  # The tree holds the scientists from now on
 
 def query_quadtree(quadtree, surname_range, awards_threshold, dblp_range):
     """Queries the quadtree to find scientists matching the specified criteria.
@@ -249,10 +432,26 @@ def query_quadtree(quadtree, surname_range, awards_threshold, dblp_range):
     Returns:
         A list of Scientist objects that match the query criteria.
     """
-    result = set()  # Use a set to avoid duplicates
+    result = []
+    x_low, x_high = ord(surname_range[0]), ord(surname_range[1])
+
+    if quadtree.root is None:
+        quadtree.subdivide()
+
+    def intersects(node):
+        return node.x0 <= x_high and node.x0 + node.width >= x_low and \
+            node.y0 + node.height > awards_threshold and \
+            node.z0 <= dblp_range[1] and node.z0 + node.depth >= dblp_range[0]
+
+    def inside(node):
+        return x_low <= node.x0 and node.x0 + node.width <= x_high and \
+            node.y0 > awards_threshold and \
+            dblp_range[0] <= node.z0 and node.z0 + node.depth <= dblp_range[1]
 
     def traverse_and_query(node):
-        if not node:
+        if inside(node):
+            # Every scientist below a node inside the query matches it
+            result.extend(collect_scientists(node))
             return
 
         for scientist in node.get_scientists():
@@ -260,16 +459,223 @@ def query_quadtree(quadtree, surname_range, awards_threshold, dblp_range):
             awards = scientist.awards
             dblp = scientist.dblp_record
 
-            if (ord(surname_range[0]) <= ord(surname[0]) <= ord(surname_range[1])) and \
+            if (x_low <= ord(surname[0]) <= x_high) and \
             (awards > awards_threshold) and \
             (dblp_range[0] <= dblp <= dblp_range[1]):
-                result.add(scientist)
+                result.append(scientist)
 
         for child in node.children:
-            traverse_and_query(child)
+            if intersects(child):
+                traverse_and_query(child)
 
     traverse_and_query(quadtree.root)
-    return list(result)
+    return result
+
+MORTON_BITS = 10  # Bits per axis of the quantised keys of a linear octree
+SCAN_SIZE = 32  # Morton intervals with this few records are scanned instead of split further
+SCAN_DENSITY = 0.5  # Morton intervals at least this full of box cells are scanned instead of split
+
+
+def spread_bits(values):
+    """Spreads the low 21 bits of integers so that two zero bits separate
+    consecutive bits, ready to be interleaved into a 3D Morton code.
+
+    Args:
+        values: A NumPy array of non-negative integers.
+
+    Returns:
+        A NumPy uint64 array of spread values.
+    """
+    v = values.astype(np.uint64) & np.uint64(0x1FFFFF)
+    v = (v | v << np.uint64(32)) & np.uint64(0x1F00000000FFFF)
+    v = (v | v << np.uint64(16)) & np.uint64(0x1F0000FF0000FF)
+    v = (v | v << np.uint64(8)) & np.uint64(0x100F00F00F00F00F)
+    v = (v | v << np.uint64(4)) & np.uint64(0x10C30C30C30C30C3)
+    v = (v | v << np.uint64(2)) & np.uint64(0x1249249249249249)
+    return v
+
+
+def morton_encode(cells):
+    """Encodes quantised (surname, awards, DBLP) cells as 3D Morton codes.
+
+    Bit 3i of a code is bit i of the surname cell, bit 3i + 1 the awards
+    cell and bit 3i + 2 the DBLP cell.
+
+    Args:
+        cells: An (n, 3) NumPy array of non-negative integer cells.
+
+    Returns:
+        A NumPy uint64 array of Morton codes.
+    """
+    return (
+        spread_bits(cells[:, 0])
+        | spread_bits(cells[:, 1]) << np.uint64(1)
+        | spread_bits(cells[:, 2]) << np.uint64(2)
+    )
+
+
+SPREAD_BYTE = spread_bits(np.arange(256)).tolist()  # spread_bits of every byte
+AXIS_MASK = 0x1249249249249249  # Bits of the first axis in a Morton code
+
+
+def spread_int(value):
+    """Scalar version of `spread_bits` for a single Python integer."""
+    return (
+        SPREAD_BYTE[value & 0xFF]
+        | SPREAD_BYTE[value >> 8 & 0xFF] << 24
+        | SPREAD_BYTE[value >> 16 & 0x1F] << 48
+    )
+
+
+def interleave(cell):
+    """Encodes a single (surname, awards, DBLP) cell as a 3D Morton code.
+
+    Args:
+        cell: A sequence of three non-negative integers.
+
+    Returns:
+        The Morton code as a Python integer, laid out as in `morton_encode`.
+    """
+    return spread_int(cell[0]) | spread_int(cell[1]) << 1 | spread_int(cell[2]) << 2
+
+
+def split_morton_box(box_low, box_high, zmin, zmax):
+    """Splits a box of cells where its Morton interval [zmin, zmax] jumps.
+
+    The highest bit in which zmin and zmax differ selects an axis and a
+    split value on it. Every code of the lower half is at most LITMAX and
+    every code of the upper half is at least BIGMIN, so the two halves
+    cover the box with two shorter Morton intervals.
+
+    Args:
+        box_low: The lowest cell of the box, one integer per axis.
+        box_high: The highest cell of the box, one integer per axis.
+        zmin: The Morton code of box_low.
+        zmax: The Morton code of box_high.
+
+    Returns:
+        Two (low, high, zmin, zmax) boxes, the LITMAX half first.
+    """
+    position = (zmin ^ zmax).bit_length() - 1
+    axis, bit = position % 3, position // 3
+    split = box_high[axis] >> bit << bit
+    keep = ~(AXIS_MASK << axis)
+
+    litmax_high = list(box_high)
+    litmax_high[axis] = split - 1
+    litmax = zmax & keep | spread_int(split - 1) << axis
+
+    bigmin_low = list(box_low)
+    bigmin_low[axis] = split
+    bigmin = zmin & keep | spread_int(split) << axis
+
+    return (box_low, litmax_high, zmin, litmax), (bigmin_low, box_high, bigmin, zmax)
+
+
+class LinearOctree():
+    """A linear octree storing scientists sorted by 3D Morton code.
+
+    The (surname, awards, DBLP) keys are quantised to MORTON_BITS per axis
+    and interleaved into one Morton code per scientist. The records are
+    kept as NumPy arrays sorted by code, without any per-node objects, and
+    a range query becomes a handful of binary searches over the codes.
+    """
+    def __init__(self, scientists=None, bits=MORTON_BITS):
+        """Initializes a LinearOctree object.
+
+        Args:
+            scientists: An optional list of Scientist objects.
+            bits: The number of bits per axis of the quantised keys (at most 21).
+        """
+        if scientists is None:
+            scientists = []
+
+        self.bits = bits
+        keys = scientist_keys(scientists)
+        if len(keys):
+            self.low, self.high = keys.min(axis=0), keys.max(axis=0)
+        else:
+            self.low = self.high = np.zeros(3)
+        extent = self.high - self.low
+        self.scale = np.divide(
+            (1 << bits) - 1, extent, out=np.zeros(3), where=extent > 0
+        )
+
+        codes = morton_encode(self.quantise(keys))
+        order = np.argsort(codes, kind="stable")
+        self.codes = codes[order]
+        self.keys = keys[order]
+        self.scientists = [scientists[i] for i in order]
+
+    def quantise(self, keys):
+        """Maps keys to integer cells, one per axis.
+
+        Args:
+            keys: An (n, 3) NumPy array of keys.
+
+        Returns:
+            An (n, 3) NumPy array of cells between 0 and 2**bits - 1.
+        """
+        cells = np.floor((keys - self.low) * self.scale)
+        return np.clip(cells, 0, (1 << self.bits) - 1).astype(np.int64)
+
+    def query(self, surname_range, awards_threshold, dblp_range):
+        """Queries the linear octree to find scientists matching the criteria.
+
+        The query box is quantised and decomposed into Morton intervals with
+        LITMAX/BIGMIN splits. An interval is split further only while it
+        contains records, holds more than SCAN_SIZE of them and is mostly
+        made up of cells outside the box; each remaining interval is
+        located with `searchsorted`. The gathered records are finally
+        checked against the exact keys.
+
+        Args:
+            surname_range: A tuple containing the starting and ending letters
+                of the surname range for filtering.
+            awards_threshold: The minimum number of awards for a scientist
+                to be included.
+            dblp_range: A tuple containing the minimum and maximum DBLP
+                records for a scientist to be included.
+
+        Returns:
+            A list of Scientist objects that match the query criteria.
+        """
+        query_low = np.array([ord(surname_range[0]), awards_threshold, dblp_range[0]], dtype=float)
+        query_high = np.array([ord(surname_range[1]), np.inf, dblp_range[1]], dtype=float)
+        if not self.scientists or (query_low > self.high).any() or (query_high < self.low).any():
+            return []
+
+        cells = self.quantise(np.array([np.maximum(query_low, self.low), np.minimum(query_high, self.high)]))
+        box_low, box_high = cells.tolist()
+        stack = [(box_low, box_high, interleave(box_low), interleave(box_high))]
+        slices = []
+        while stack:
+            box_low, box_high, zmin, zmax = stack.pop()
+
+            start = np.searchsorted(self.codes, np.uint64(zmin), side="left")
+            stop = np.searchsorted(self.codes, np.uint64(zmax), side="right")
+            if start == stop:
+                continue  # No records in this part of the box
+
+            volume = 1
+            for low, high in zip(box_low, box_high):
+                volume *= high - low + 1
+            if volume >= SCAN_DENSITY * (zmax - zmin + 1) or stop - start <= SCAN_SIZE:
+                slices.append((start, stop))
+            else:
+                stack.extend(split_morton_box(box_low, box_high, zmin, zmax))
+
+        if not slices:
+            return []
+        indexes = np.concatenate([np.arange(start, stop) for start, stop in slices])
+
+        keys = self.keys[indexes]
+        matches = (
+            (keys[:, 0] >= query_low[0]) & (keys[:, 0] <= query_high[0])
+            & (keys[:, 1] > awards_threshold)
+            & (keys[:, 2] >= query_low[2]) & (keys[:, 2] <= query_high[2])
+        )
+        return [self.scientists[i] for i in np.sort(indexes[matches])]
 
 
 def main():
@@ -282,11 +688,14 @@ def main():
         return
     start_time_total=time.time()
     start_time=time.time()
-    # Creating an instance of the QTree class with manually added and randomly generated scientists
-    quadtree = QTree(surname_range=('A', 'Z'), awards_threshold=-1, dblp_range=(1, 100000))
-
-    # Loading scientists from CSV file
-    quadtree.load_scientists_from_csv(r".\Data\new_computer_scientists_data.csv")
+    # Creating an instance of the QTree class, independent of the query
+    quadtree = QTree(split="median")
+
+    # Loading scientists from CSV file and building the tree once
+    csv_file_path = r".\Data\new_computer_scientists_data.csv"
+    quadtree.load_scientists_from_csv(csv_file_path)
+    all_scientists = list(quadtree.scientists)  # In row id order of the signature store
+    quadtree.subdivide()
     end_time=time.time()
     build_time=end_time-start_time
 
@@ -315,16 +724,22 @@ def main():
     """-------LSH Similarity Queries------------"""
     sys.path.append("LSH")
     import LSH
-    # Create the educations list
-    educations = []
+    # Signatures of the whole dataset, computed once and reused by every query
+    signature_store = LSH.SignatureStore.load_or_build(
+        csv_file_path, [scientist.education for scientist in all_scientists], k=4, hash_functions_count=100
+    )
+
+    # Create the row ids list
+    row_of = {id(scientist): row_id for row_id, scientist in enumerate(all_scientists)}
+    row_ids = []
 
     for result in results:
-        educations.append(result.education)  # Education string is at position 3
+        row_ids.append(row_of[id(result)])
     
     simil_thresh = 0.5
     start_time = time.time()
-    similar_education_indexes = LSH.check_lsh_similarity(
-        educations, k=4, b=25, threshold=simil_thresh, hash_functions_count=100
+    similar_education_indexes = LSH.check_lsh_similarity_in_store(
+        signature_store, row_ids, b=None, threshold=simil_thresh
     )
     lshend_time = time.time()
     lsh_time = lshend_time - start_time
@@ -1,5 +1,7 @@
 import math
 import csv
+import heapq
+import itertools
 import string
 import time
 import sys
@@ -144,7 +146,7 @@ def minimum_bounding_object_calculator(points, dimensions):
                 if isinstance(point, MinimumBoundingObject):
                     if convert_to_mapping(point.low[i]) < lower[i]:
                         lower[i] = convert_to_mapping(point.low[i])
-                    elif convert_to_mapping(point.high[i]) > upper[i]:
+                    if convert_to_mapping(point.high[i]) > upper[i]:
                         upper[i] = convert_to_mapping(point.high[i])
                 else:
                     # Handle the case where the element is a Scientist object
@@ -153,7 +155,7 @@ def minimum_bounding_object_calculator(points, dimensions):
                     )
                     if value < lower[i]:
                         lower[i] = value
-                    elif value > upper[i]:
+                    if value > upper[i]:
                         upper[i] = value
             except IndexError as e:
                 # print(f"Error processing point: {point}")
@@ -334,6 +336,100 @@ class RTree:
 
         return results
 
+    def skyline_query(self, root, surname_range=None, awards_range=None, dblp_range=None):
+        """Finds the scientists that are not dominated on both awards and DBLP
+        records, using branch-and-bound skyline (BBS) search.
+
+        A scientist dominates another one when it has at least as many awards
+        and DBLP records and strictly more of at least one of them. Entries are
+        visited in decreasing order of the best awards + DBLP records they can
+        reach, so a bounding object whose best corner is already dominated by
+        a skyline scientist is pruned together with its whole subtree, and only
+        the nodes that can contribute to the skyline are read.
+
+        Args:
+            root: The root node of the R-tree.
+
+            surname_range: An optional tuple representing the range of surnames
+                to search.
+
+            awards_range: An optional tuple representing the range of awards to
+                search.
+
+            dblp_range: An optional tuple representing the range of DBLP records
+                to search.
+
+        Returns:
+            A list of Scientist objects forming the skyline, in decreasing order
+            of awards + DBLP records.
+        """
+        if root is None:
+            return []
+
+        # Constraint region in the mapped space of the tree (surname, awards, dblp)
+        constraints = []
+        for value_range in (surname_range, awards_range, dblp_range):
+            if value_range is None:
+                constraints.append((float("-inf"), float("inf")))
+            else:
+                constraints.append(
+                    (self.convert_to_mapping(value_range[0]), self.convert_to_mapping(value_range[1]))
+                )
+
+        def dominated(awards, dblp_records):
+            for scientist in skyline:
+                if (
+                    scientist.awards >= awards
+                    and scientist.dblp_records >= dblp_records
+                    and (scientist.awards > awards or scientist.dblp_records > dblp_records)
+                ):
+                    return True
+            return False
+
+        def push(item):
+            if isinstance(item, MinimumBoundingObject):
+                for i, (low, high) in enumerate(constraints):
+                    if item.high[i] < low or item.low[i] > high:
+                        return  # Bounding object lies outside the constraint region
+                # Best corner of the part of the bounding object inside the constraints
+                awards = min(item.high[1], constraints[1][1])
+                dblp_records = min(item.high[2], constraints[2][1])
+            else:
+                values = (
+                    self.convert_to_mapping(item.surname),
+                    item.awards,
+                    item.dblp_records,
+                )
+                for value, (low, high) in zip(values, constraints):
+                    if not low <= value <= high:
+                        return
+                awards = item.awards
+                dblp_records = item.dblp_records
+
+            if not dominated(awards, dblp_records):
+                heapq.heappush(heap, (-(awards + dblp_records), next(counter), awards, dblp_records, item))
+
+        skyline = []
+        heap = []
+        counter = itertools.count()  # Tie-breaker, items are not comparable
+        for item in root.items:
+            push(item)
+
+        while heap:
+            _, _, awards, dblp_records, item = heapq.heappop(heap)
+
+            # The skyline may have grown since the entry was pushed
+            if dominated(awards, dblp_records):
+                continue
+
+            if isinstance(item, MinimumBoundingObject):
+                for child_item in item.child.items:
+                    push(child_item)
+            else:
+                skyline.append(item)
+
+        return skyline
+
     def __str__(self):
         """Creates a string representation of the R-tree.
 
@@ -452,11 +548,12 @@ def main():
     end_time = time.time()
     search_time = end_time - start_time
     search_results = []
+    row_ids = []  # Rows of the results in the signature store
     
 
     # Print education of the first scientist in the result
     if range_query_result:
-        for scientist in scientists_list:
+        for row_id, scientist in enumerate(scientists_list):
             if scientist.surname in range_query_result:
                 print("--------------------------------------")
                 print(
@@ -465,20 +562,20 @@ def main():
                 print(f"Education: {scientist.education}")
                 print("--------------------------------------")
                 search_results.append(scientist)
+                row_ids.append(row_id)
 
     """-------LSH Similarity Queries------------"""
     sys.path.append("LSH")
     import LSH
-    # Create the educations list
-    educations = []
-
-    for result in search_results:
-        educations.append(result.education)  # Education string is at position 3
+    # Signatures of the whole dataset, computed once and reused by every query
+    signature_store = LSH.SignatureStore.load_or_build(
+        csv_file_path, [scientist.education for scientist in scientists_list], k=4, hash_functions_count=100
+    )
         
     simil_thresh = 0.5
     start_time = time.time()
-    similar_education_indexes = LSH.check_lsh_similarity(
-        educations, k=4, b=25, threshold=simil_thresh, hash_functions_count=100
+    similar_education_indexes = LSH.check_lsh_similarity_in_store(
+        signature_store, row_ids, b=None, threshold=simil_thresh
     )
     lshend_time = time.time()
     lsh_time = lshend_time - start_time
@@ -291,16 +291,18 @@ def main():
     
     # Read the scientist data from the csv file and store it in a list of points
     points = []
-    with open(
-        r".\Data\small_computer_scientists_data.csv", "r", encoding="utf-8"
-    ) as file:
+    all_educations = []  # Education of every row, in row id order
+    csv_file_path = r".\Data\small_computer_scientists_data.csv"
+    with open(csv_file_path, "r", encoding="utf-8") as file:
         reader = csv.DictReader(file)
         for row in reader:
             surname = row["Surname"]
             awards = int(row["Awards"])
             education = row["Education"]
             dblp_record = int(row["DBLP Info"])
-            points.append((surname, awards, dblp_record ,education))
+            row_id = len(all_educations)  # Row of the point in the signature store
+            all_educations.append(education)
+            points.append((surname, awards, dblp_record ,education, row_id))
 
 
     # Displaying the list of points
@@ -346,16 +348,21 @@ def main():
     """-------LSH Similarity Queries------------"""
 
     # LSH Similarity Queries
-    # Create the educations list
-    educations = []
+    # Signatures of the whole dataset, computed once and reused by every query
+    signature_store = LSH.SignatureStore.load_or_build(
+        csv_file_path, all_educations, k=4, hash_functions_count=100
+    )
+
+    # Create the row ids list
+    row_ids = []
 
     for result in search_results:
-        educations.append(result[3])  # Education string is at position 3
+        row_ids.append(result[4])  # Row id is at position 4
 
     simil_thresh = 0.9
     start_time = time.time()
-    similar_education_indexes = LSH.check_lsh_similarity(
-        educations, k=4, b=25, threshold=simil_thresh, hash_functions_count=100
+    similar_education_indexes = LSH.check_lsh_similarity_in_store(
+        signature_store, row_ids, b=None, threshold=simil_thresh
     )
     lshend_time = time.time()
     lsh_time = lshend_time - start_time